@@ -3,113 +3,123 @@ import streamlit as st
 import pandas as pd
 from pathlib import Path
 
-from src.common.cache import get_aggregated_data, get_data, get_ngram_distributions
+from src.common.artifacts import Selection, set_selection
+from src.common.cache import get_cache_stats, get_places
+from src.common.timing import timed, timing_summary
+from src.config import SHOW_TIMINGS
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
-# --- CONFIG ---
-st.set_page_config(
-    page_title='Sentience Dashboard',
-    layout='wide',
-    initial_sidebar_state='collapsed'
-)
-
-# --- PAGE SETUP ---
-main_page = st.Page(
-    page='pages/main_page.py',
-    title='Main Page',
-    icon=':material/home:',
-    default=True
-)
-content_page = st.Page(
-    page='pages/content_analysis.py',
-    title='Content Analysis',
-    icon=':material/article:',
-)
-strategy_page = st.Page(
-    page='pages/strategy_navigator.py',
-    title='Strategy Navigator',
-    icon=':material/explore:',
-)
-
-# --- NAVIGATION SETUP ---
-pg = st.navigation(pages=[main_page, content_page,
-                   strategy_page], position='top')
-
-
-# --- GET DATA ---
-df = get_data()
-
-# --- SIDEBAR SETUP ---
-with st.sidebar:
-    st.header('Overview Metrics')
-    # Location filter
-    locations = df['place_name'].unique().tolist()
-    selected_locations = st.multiselect(
-        'Select Locations', options=locations, default=locations)
-    if selected_locations == []:
-        df_filter_loc = df.copy()
-    else:
-        df_filter_loc = df[df['place_name'].isin(selected_locations)].copy()
-
-    # Date input
-    max_date = df_filter_loc["publish_time"].max().date()
-    min_date = df_filter_loc["publish_time"].min().date()
-
-    if (max_date - min_date).days > 365:
-        default_start_date = max_date - pd.Timedelta(days=365)
-    else:
-        default_start_date = min_date
-
-    default_end_date = max_date
-
-    date_range = st.date_input(
-        "Choose timeframe:",
-        value=(default_start_date, default_end_date),
-        min_value=min_date,
-        max_value=max_date,
+
+def reset_evidence_page():
+    # another selection gives other evidence, start from its first page
+    st.session_state['evidence_page'] = 1
+
+
+# The whole script body is timed; widgets inside a fragment rerun only that fragment, so these
+# timings cover full reruns
+with timed('full_rerun'):
+    # --- CONFIG ---
+    st.set_page_config(
+        page_title='Sentience Dashboard',
+        layout='wide',
+        initial_sidebar_state='collapsed'
+    )
+
+    # --- PAGE SETUP ---
+    main_page = st.Page(
+        page='pages/main_page.py',
+        title='Main Page',
+        icon=':material/home:',
+        default=True
+    )
+    content_page = st.Page(
+        page='pages/content_analysis.py',
+        title='Content Analysis',
+        icon=':material/article:',
     )
+    strategy_page = st.Page(
+        page='pages/strategy_navigator.py',
+        title='Strategy Navigator',
+        icon=':material/explore:',
+    )
+
+    # --- NAVIGATION SETUP ---
+    pg = st.navigation(pages=[main_page, content_page,
+                       strategy_page], position='top')
+
+
+    # --- GET DATA ---
+    places = get_places()
+
+    # --- SIDEBAR SETUP ---
+    with st.sidebar:
+        st.header('Overview Metrics')
+        # Location filter
+        locations = places['place_name'].unique().tolist()
+        selected_locations = st.multiselect(
+            'Select Locations', options=locations, default=locations, on_change=reset_evidence_page)
+        if selected_locations == []:
+            places_filter_loc = places
+        else:
+            places_filter_loc = places[places['place_name'].isin(selected_locations)]
+
+        # Date input
+        max_date = places_filter_loc["max_time"].max().date()
+        min_date = places_filter_loc["min_time"].min().date()
+
+        if (max_date - min_date).days > 365:
+            default_start_date = max_date - pd.Timedelta(days=365)
+        else:
+            default_start_date = min_date
+
+        default_end_date = max_date
+
+        date_range = st.date_input(
+            "Choose timeframe:",
+            value=(default_start_date, default_end_date),
+            min_value=min_date,
+            max_value=max_date,
+            on_change=reset_evidence_page,
+        )
     
-    # Wait for both dates to be selected
-    if len(date_range) != 2:
-        st.warning("Please select both start and end dates.")
-        st.stop()
+        # Wait for both dates to be selected
+        if len(date_range) != 2:
+            st.warning("Please select both start and end dates.")
+            st.stop()
     
-    start_date, end_date = date_range
-    df_filtered = df_filter_loc[
-        (df_filter_loc["publish_time"].dt.date >= start_date)
-        & (df_filter_loc["publish_time"].dt.date <= end_date)
-    ].copy()
-
-    # Time scale selection
-    options = ['Daily', 'Weekly']
-    if end_date - start_date > pd.Timedelta(days=30):
-        options = options + ['Monthly']
-    if end_date - start_date > pd.Timedelta(days=90):
-        options = options + ['Quarterly']
-    if end_date - start_date > pd.Timedelta(days=365):
-        options = options + ['Yearly']
-    timescale = st.selectbox('Select Time Scale', options=options)
-
-    timescale_map = {
-        'Daily': 'D',
-        'Weekly': 'W-MON',
-        'Monthly': 'M',
-        'Quarterly': 'Q',
-        'Yearly': 'Y'
-    }
-    df_display = get_aggregated_data(df_filtered, timescale_map[timescale])
-
-# --- SESSION STATE SETUP ---
-# Always update session state with latest filtered data
-st.session_state['df_filtered'] = df_filtered
-st.session_state['df_display'] = df_display
-st.session_state['timescale'] = timescale
-st.session_state['positive_ngrams_dists'] = get_ngram_distributions(
-    df_filtered[df_filtered['sentiment_label'] == 'Positive'])
-st.session_state['negative_ngrams_dists'] = get_ngram_distributions(
-    df_filtered[df_filtered['sentiment_label'] == 'Negative'])
-
-# --- RUN NAVIATION ---
-pg.run()
+        start_date, end_date = date_range
+        selected_place_ids = tuple(places_filter_loc['place_id'])
+
+        # Time scale selection
+        options = ['Daily', 'Weekly']
+        if end_date - start_date > pd.Timedelta(days=30):
+            options = options + ['Monthly']
+        if end_date - start_date > pd.Timedelta(days=90):
+            options = options + ['Quarterly']
+        if end_date - start_date > pd.Timedelta(days=365):
+            options = options + ['Yearly']
+        timescale = st.selectbox('Select Time Scale', options=options)
+
+        timescale_map = {
+            'Daily': 'D',
+            'Weekly': 'W-MON',
+            'Monthly': 'M',
+            'Quarterly': 'Q',
+            'Yearly': 'Y'
+        }
+
+    # --- SESSION STATE SETUP ---
+    # Pages compute what they need from the selection on first access, see src/common/artifacts.py
+    set_selection(Selection(selected_place_ids, start_date, end_date, timescale_map[timescale]))
+    st.session_state['timescale'] = timescale
+
+    logger.debug(f"Selection cache: {get_cache_stats()}")
+
+    # --- RUN NAVIATION ---
+    pg.run()
+
+if SHOW_TIMINGS:
+    with st.sidebar.expander('Rerun timings'):
+        st.dataframe(timing_summary(), hide_index=True)
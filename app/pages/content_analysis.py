@@ -1,12 +1,16 @@
 # app/pages/content_analysis.py
 
+import math
+
 import streamlit as st
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
 
 from src.analytics.aggregations import evidence_search
+from src.common.artifacts import get_artifact, require
+from src.common.timing import timed
+from src.config import EVIDENCE_PAGE_SIZE, SERVING_MODE
+from src.embeddings import load_embedding_index
 
-from src.visualizations.wordcloud import generate_wordcloud, render_wordcloud_figure
+from src.visualizations.wordcloud import wordcloud_png
 from src.visualizations.plots import ngram_bar_chart, render_pie_chart
 
 from src.utils.logger import get_logger
@@ -67,42 +71,133 @@ logger = get_logger(__name__)
 
 @st.fragment
 def render_ngram_section(title: str, data_key: str, options: dict, color: str, colormap: str, key_prefix: str):
-    st.markdown(f"##### {title}")
-    inner_cols = st.columns(4)
+    with timed(f'content_analysis.{key_prefix}_ngrams'):
+        st.markdown(f"##### {title}")
+        inner_cols = st.columns(4)
     
-    with inner_cols[0]:
-        ngram_type_key = st.selectbox(
-            f'Select n-gram type for {title}', 
-            options=list(options.keys()), 
-            key=f'{key_prefix}_ngram_type', 
-            label_visibility='collapsed'
-        )
+        with inner_cols[0]:
+            ngram_type_key = st.selectbox(
+                f'Select n-gram type for {title}', 
+                options=list(options.keys()), 
+                key=f'{key_prefix}_ngram_type', 
+                label_visibility='collapsed'
+            )
     
-    with inner_cols[1]:
-        toggle = st.toggle(
-            'Chart / Cloud', 
-            value=True, 
-            key=f'{key_prefix}_ngram_toggle', 
-            help=f'Toggle view for {title}.'
-        )
+        with inner_cols[1]:
+            toggle = st.toggle(
+                'Chart / Cloud', 
+                value=True, 
+                key=f'{key_prefix}_ngram_toggle', 
+                help=f'Toggle view for {title}.'
+            )
+
+        # Get data
+        ngrams_dists = get_artifact(data_key)
+        selected_gram = options[ngram_type_key] # e.g. '1', '2'
+        data = ngrams_dists[f'{selected_gram}_gram']
 
-    # Get data
-    ngrams_dists = st.session_state[data_key]
-    selected_gram = options[ngram_type_key] # e.g. '1', '2'
-    data = ngrams_dists[f'{selected_gram}_gram']
+        if toggle:
+            # WordCloud, rendered to PNG once per n-gram set and colormap
+            st.image(wordcloud_png(data, colormap=colormap), width='stretch')
+        else:
+            # Bar Chart
+            chart = ngram_bar_chart(data, color=color)
+            st.altair_chart(chart, width='stretch')
 
-    if toggle:
-        # WordCloud
-        wordcloud = generate_wordcloud(data, colormap=colormap)
-        fig = render_wordcloud_figure(wordcloud)
-        st.pyplot(fig)
-    else:
-        # Bar Chart
-        chart = ngram_bar_chart(data, color=color)
-        st.altair_chart(chart, width='stretch')
 
+def reset_evidence_page():
+    # a new query, sort or filter starts from its first page of results
+    st.session_state['evidence_page'] = 1
+
+# Evidence Explorer, its controls rerun only this fragment
+@st.fragment
+def render_evidence_explorer(df_filtered):
+    with timed('content_analysis.evidence_explorer'):
+        with st.container():
+            st.subheader('Evidence Explorer')
+            left_col, right_col = st.columns([1, 3], gap='large')
+            with left_col:
+                st.markdown("##### Search quotes")
+        
+                if 'query' not in st.session_state:
+                    st.session_state['query'] = ''
+                query = st.text_input('Enter phrase to search',
+                                      placeholder='e.g., great product',
+                                      value=st.session_state['query'],
+                                      on_change=reset_evidence_page
+                                      )
+        
+                search_mode = 'Keyword'
+                # embedding the query needs the model, which serving mode never loads
+                if not SERVING_MODE and load_embedding_index() is not None:
+                    st.markdown('**Search mode:**')
+                    search_mode = st.radio('Search mode',
+                                           ['Keyword', 'Semantic'],
+                                           index=0,
+                                           horizontal=True,
+                                           help='Semantic search also finds paraphrases of the phrase.',
+                                           label_visibility='collapsed',
+                                           on_change=reset_evidence_page)
+        
+                st.markdown('**Sort by:**')
+                sort_by = st.radio('Sort by',
+                                   ['Latest', 'Highest Rating', 'Lowest Rating'],
+                                   index=0,
+                                   help='With a keyword phrase, reviews containing more of its words come first '
+                                        'and are sorted within each group. Semantic results follow similarity.',
+                                   label_visibility='collapsed',
+                                   on_change=reset_evidence_page)
+
+                st.markdown('**Filter by sentiment:**')
+                sentiment_filter = st.multiselect('Filter by sentiment',
+                                                  options=['Positive', 'Neutral', 'Negative'],
+                                                  default=['Positive', 'Neutral', 'Negative'],
+                                                  label_visibility='collapsed',
+                                                  on_change=reset_evidence_page)
+                # Perform evidence search and store in session state, only the current page is materialized
+                page = st.session_state.get('evidence_page', 1)
+                st.session_state['evidence_df'], n_results = evidence_search(
+                    df_filtered,
+                    text=query,
+                    sort_by=sort_by,
+                    filter=sentiment_filter,
+                    page=page - 1,
+                    mode=search_mode
+                )
+            with right_col:
+                st.markdown('##### Search Results')
+                n_pages = max(1, math.ceil(n_results / EVIDENCE_PAGE_SIZE))
+                if page > n_pages:
+                    # fewer results than before, jump to the last page
+                    st.session_state['evidence_page'] = page = n_pages
+                    st.session_state['evidence_df'], n_results = evidence_search(
+                        df_filtered, text=query, sort_by=sort_by,
+                        filter=sentiment_filter, page=page - 1, mode=search_mode)
+                page_col, count_col = st.columns([1, 3])
+                with page_col:
+                    st.number_input('Page', min_value=1, max_value=n_pages, key='evidence_page')
+                with count_col:
+                    st.caption(f'{n_results:,} results, page {page} of {n_pages}')
+                st.dataframe(st.session_state['evidence_df'],
+                             column_config={
+                                'review_text': st.column_config.TextColumn(
+                                    'Review Text',
+                                    width='large',
+                                ),
+                                'rating': st.column_config.NumberColumn(
+                                    'Rating',
+                                    format='%d ⭐',
+                                ),
+                                'publish_time': st.column_config.DatetimeColumn(
+                                    'Published On',
+                                    format='YYYY-MM-DD',
+                                ),
+                                'sentiment_label': 'Sentiment'
+                             },
+                             hide_index=True)
 
 st.title('Content Analysis')
+df_filtered, = require('df_filtered')
 
 # --- CONTENT ANALYSIS PAGE ---
 # CONTAINER FOR N-GRAM SECTIONS
@@ -142,55 +237,6 @@ with st.container():
 #             colors=color_map
 #             )
 #         st.altair_chart(chart, width='stretch')
-with st.container():
-    st.subheader('Evidence Explorer')
-    left_col, right_col = st.columns([1, 3], gap='large')
-    with left_col:
-        st.markdown("##### Search quotes")
-        
-        if 'query' not in st.session_state:
-            st.session_state['query'] = ''
-        query = st.text_input('Enter phrase to search',
-                              placeholder='e.g., great product',
-                              value=st.session_state['query']
-                              )
-        
-        st.markdown('**Sort by:**')
-        sort_by = st.radio('Sort by',
-                           ['Latest', 'Highest Rating', 'Lowest Rating'],
-                           index=0,
-                           label_visibility='collapsed')
-        
-        st.markdown('**Filter by sentiment:**')
-        sentiment_filter = st.multiselect('Filter by sentiment',
-                                          options=['Positive', 'Neutral', 'Negative'],
-                                          default=['Positive', 'Neutral', 'Negative'],
-                                          label_visibility='collapsed')
-        # Perform evidence search and store in session state
-        st.session_state['evidence_df'] = evidence_search(
-            st.session_state['df_filtered'],
-            text=query,
-            sort_by=sort_by,
-            filter=sentiment_filter
-        )
-    with right_col:
-        st.markdown('##### Search Results')
-        st.dataframe(st.session_state['evidence_df'],
-                     column_config={
-                        'review_text': st.column_config.TextColumn(
-                            'Review Text',
-                            width='large',
-                        ),
-                        'rating': st.column_config.NumberColumn(
-                            'Rating',
-                            format='%d ⭐',
-                        ),
-                        'publish_time': st.column_config.DatetimeColumn(
-                            'Published On',
-                            format='YYYY-MM-DD',
-                        ),
-                        'sentiment_label': 'Sentiment'
-                     },
-                     hide_index=True)
-        
 
+# CONTAINER FOR EVIDENCE EXPLORER
+render_evidence_explorer(df_filtered)
@@ -5,7 +5,9 @@ import pandas as pd
 import altair as alt
 
 from src.visualizations.plots import create_main_chart, create_trend_chart, rating_distribution_chart
-from src.analytics.aggregations import display_delta, calculate_delta
+from src.analytics.aggregations import display_delta
+from src.common.artifacts import require
+from src.common.timing import timed
 
 from src.utils.logger import get_logger
 logger = get_logger(__name__)
@@ -66,64 +68,59 @@ def sentiment_progress_bar(value: float, height: int = 10):
 
     st.markdown(bar_html, unsafe_allow_html=True)
 
-# KPI cards
-def kpi_cards(df: pd.DataFrame, df_filtered: pd.DataFrame):
-    col1, col2, col3, col4 = st.columns(4)
-
-    with col1:
-        with st.container(border=True, height="stretch"):
-            delta = calculate_delta(df, "cum_reviews")
-            st.metric("💬 Review count",
-                      f'{df["cum_reviews"].iloc[-1]:,}', delta=0.0)
-
-    with col2:
-        with st.container(border=True, height="stretch"):
-            delta = calculate_delta(df, "avg_rating")
-            st.metric(
-                "⭐ Rating average",
-                f'{df["avg_rating"].iloc[-1]:.2f} / 5.0',
-                delta=display_delta(delta),
-            )
-            st.altair_chart(rating_distribution_chart(df_filtered), width='stretch')
-
-    with col3:
-        with st.container(border=True, height="stretch"):
-            delta = calculate_delta(df, "sentiment_index")
-            st.metric(
-                "📊 Sentiment Index",
-                f'{df["sentiment_index"].iloc[-1]:.2f} / 100',
-                delta=display_delta(delta),
-            )
-            sentiment_progress_bar(df["sentiment_index"].iloc[-1])
-
-    with col4:
-        with st.container(border=True, height="stretch"):
-            delta = calculate_delta(df, "positive_ratio")
-            st.metric(
-                "😃 Positive",
-                f'{df["positive_ratio"].iloc[-1]:.0%}',
-                delta=display_delta(delta, decimals=2,
-                                    scale=100, suffix="p.p."),
-            )
-            neg = df["negative_ratio"].iloc[-1]
-            neu = df["neutral_ratio"].iloc[-1]
-            st.caption(f"Negative: {neg:.0%} | Neutral: {neu:.0%}")
-
-
-# --- MAIN PAGE ---
-st.title('Main page')
-st.write('Welcome to Sentience Dashboard. This is an overview of your sentiment analysis data.')
-
-try:
-    df_filtered = st.session_state['df_filtered']
-    df_display = st.session_state['df_display']
-
-    if df_display.empty:
-        st.warning('No data available to display.')
-    else:
-        # kpi
-        kpi_cards(df_display, df_filtered)
-        
+# KPI cards, drawn on every full rerun as they follow the sidebar selection
+def kpi_cards(kpis: dict):
+    with timed('main_page.kpi_cards'):
+        current, previous = kpis['current'], kpis['previous']
+
+        def delta(column: str) -> float:
+            # same as calculate_delta on the aggregated frame: 0 without a previous period to compare
+            if previous is None or pd.isna(previous[column]) or pd.isna(current[column]):
+                return 0
+            return current[column] - previous[column]
+
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            with st.container(border=True, height="stretch"):
+                st.metric("💬 Review count",
+                          f'{current["cum_reviews"]:,}', delta=0.0)
+
+        with col2:
+            with st.container(border=True, height="stretch"):
+                st.metric(
+                    "⭐ Rating average",
+                    f'{current["avg_rating"]:.2f} / 5.0',
+                    delta=display_delta(delta("avg_rating")),
+                )
+                st.altair_chart(rating_distribution_chart(counts=kpis['rating_counts']), width='stretch')
+
+        with col3:
+            with st.container(border=True, height="stretch"):
+                st.metric(
+                    "📊 Sentiment Index",
+                    f'{current["sentiment_index"]:.2f} / 100',
+                    delta=display_delta(delta("sentiment_index")),
+                )
+                sentiment_progress_bar(current["sentiment_index"])
+
+        with col4:
+            with st.container(border=True, height="stretch"):
+                st.metric(
+                    "😃 Positive",
+                    f'{current["positive_ratio"]:.0%}',
+                    delta=display_delta(delta("positive_ratio"), decimals=2,
+                                        scale=100, suffix="p.p."),
+                )
+                neg = current["negative_ratio"]
+                neu = current["neutral_ratio"]
+                st.caption(f"Negative: {neg:.0%} | Neutral: {neu:.0%}")
+
+
+# Charts with their controls, a control change reruns only this fragment
+@st.fragment
+def render_charts(df_display: pd.DataFrame, timescale: str):
+    with timed('main_page.charts'):
         # Controls in one row
         col_controls1, col_controls2 = st.columns(2)
         
@@ -155,18 +152,34 @@ try:
         
         with col_chart1:
             chart1 = create_main_chart(
-                df_display, timeunit_map[st.session_state['timescale']], color, height=450
+                df_display, timeunit_map[timescale], color, height=450
             )
             st.altair_chart(chart1, width='stretch')
         
         with col_chart2:
             chart2 = create_trend_chart(
                 df_display,
-                timeunit_map[st.session_state['timescale']],
+                timeunit_map[timescale],
                 chart_type=chart_type_map[chart2_type],
                 height=450
             )
             st.altair_chart(chart2, width='stretch')
+
+
+# --- MAIN PAGE ---
+st.title('Main page')
+st.write('Welcome to Sentience Dashboard. This is an overview of your sentiment analysis data.')
+
+try:
+    df_display, kpis = require('df_display', 'kpis')
+
+    if df_display.empty or kpis is None:
+        st.warning('No data available to display.')
+    else:
+        # kpi
+        kpi_cards(kpis)
+        
+        render_charts(df_display, st.session_state['timescale'])
         #st.dataframe(df_filtered.head(10))
                 
 except Exception as e:
@@ -0,0 +1,51 @@
+# benchmarks/backend_parity.py
+"""Compare sentiment backends against the reference transformers pipeline.
+
+Reports label agreement, score drift and wall time for every backend on the
+reviews CSV. Usage: python -m benchmarks.backend_parity --backends torch torch-int8 onnx
+"""
+
+import argparse
+import time
+
+import numpy as np
+from transformers import pipeline
+
+from src.config import DATA_FILE_PATH, SENTIMENT_MODEL, SENTIMENT_MAX_LENGTH
+from src.data_loader import load_data
+from src.preprocess import format_data, clean_data
+from src.sentiment_analysis import SentimentClassifier
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', default=DATA_FILE_PATH, help='CSV file with reviews')
+    parser.add_argument('--backends', nargs='+', default=['torch', 'torch-int8', 'onnx'])
+    args = parser.parse_args()
+
+    texts = clean_data(format_data(load_data(args.file)))['review_text'].tolist()
+
+    reference = pipeline('sentiment-analysis', model=SENTIMENT_MODEL)
+    start = time.perf_counter()
+    results = reference(texts, truncation=True, max_length=SENTIMENT_MAX_LENGTH)
+    reference_time = time.perf_counter() - start
+    ref_labels = np.array([res['label'] for res in results])
+    ref_scores = np.array([res['score'] for res in results])
+
+    print(f'\n{len(texts)} reviews, reference pipeline: {reference_time:.2f}s')
+    print(f'{"backend":>12} {"seconds":>8} {"agreement":>10} {"mean drift":>11} {"max drift":>10}')
+    for backend in args.backends:
+        classifier = SentimentClassifier(backend=backend)
+        if classifier.backend != backend:
+            print(f'{backend:>12} unavailable, fell back to {classifier.backend}')
+            continue
+        start = time.perf_counter()
+        labels, scores = classifier.predict(texts)
+        elapsed = time.perf_counter() - start
+        agreement = np.mean(np.array(labels) == ref_labels)
+        drift = np.abs(scores - ref_scores)
+        print(f'{backend:>12} {elapsed:>8.2f} {agreement:>10.2%} {drift.mean():>11.4f} {drift.max():>10.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# benchmarks/sentiment_scaling.py
+"""Measure sentiment inference throughput as worker processes are added.
+
+Usage: python -m benchmarks.sentiment_scaling --rows 5000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from src.config import DATA_FILE_PATH, SENTIMENT_BATCH_SIZE, SENTIMENT_NUM_THREADS
+from src.data_loader import load_data
+from src.preprocess import format_data, clean_data
+from src.sentiment_analysis import analyze_sentiments, get_classifier
+
+
+def replicate_reviews(df: pd.DataFrame, n_rows: int) -> pd.DataFrame:
+    """Repeat the sample reviews up to n_rows, keeping review_id unique."""
+    repeats = -(-n_rows // len(df)) # ceil division
+    df = pd.concat([df] * repeats, ignore_index=True).head(n_rows)
+    df['review_id'] = df['review_id'] + '_' + df.index.astype(str)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', default=DATA_FILE_PATH, help='CSV file with reviews')
+    parser.add_argument('--rows', type=int, default=5000, help='number of reviews to classify')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1],
+                        help='pool sizes to measure, 1 is the single-process path')
+    args = parser.parse_args()
+
+    df = replicate_reviews(clean_data(format_data(load_data(args.file))), args.rows)
+    # single-process baseline is measured with a warm model, the one analyze_sentiments loads
+    get_classifier(SENTIMENT_NUM_THREADS, SENTIMENT_BATCH_SIZE)
+
+    results = []
+    for n_workers in sorted(set(args.workers) | {1}):
+        start = time.perf_counter()
+        analyze_sentiments(df, n_workers=n_workers)
+        elapsed = time.perf_counter() - start
+        results.append((n_workers, elapsed, len(df) / elapsed))
+
+    baseline = results[0][2]
+    print(f'\n{"workers":>8} {"seconds":>10} {"reviews/s":>10} {"speedup":>8}')
+    for n_workers, elapsed, throughput in results:
+        print(f'{n_workers:>8} {elapsed:>10.2f} {throughput:>10.1f} {throughput / baseline:>7.2f}x')
+    print('\nPool timings include worker start-up and one model load per worker.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/startup.py
+"""Measure dashboard cold start: import time, peak RSS and which ML libraries get loaded.
+
+Every measurement runs in a fresh interpreter. Point --repo at another checkout (e.g. a git
+worktree of an older commit) to compare before and after.
+Usage: python -m benchmarks.startup --modules src.common.cache src.common.artifacts --load
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+HEAVY_MODULES = ['torch', 'transformers', 'spacy', 'sentence_transformers']
+
+# Runs in the child interpreter, prints one JSON line
+PROBE = '''
+import json, resource, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+imported = time.perf_counter() - start
+loaded = None
+if {load!r}:
+    from src.config import DATA_FILE_PATH
+    from src.data_loader import load_enriched_data
+    start = time.perf_counter()
+    load_enriched_data(DATA_FILE_PATH)
+    loaded = time.perf_counter() - start
+print(json.dumps({{
+    'import_s': imported,
+    'load_s': loaded,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy': [name for name in {heavy!r} if name in sys.modules],
+}}))
+'''
+
+
+def measure(repo: Path, modules: list[str], load: bool, serving: bool) -> dict:
+    """Cold start of one fresh interpreter importing the modules (and loading the data)."""
+    env = {**os.environ, 'SENTIENCE_SERVING_MODE': '1' if serving else '0'}
+    code = PROBE.format(modules=modules, load=load, heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, '-c', code], cwd=repo, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f'Probe failed in {repo}:\n{result.stderr}')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repo', type=Path, nargs='+', default=[Path.cwd()], help='checkouts to compare')
+    parser.add_argument('--modules', nargs='+', default=['src.common.cache'], help='modules the dashboard imports')
+    parser.add_argument('--load', action='store_true', help='also load the enriched data (needs a warm enrichment store)')
+    parser.add_argument('--repeat', type=int, default=3, help='fresh interpreters per configuration, the fastest is kept')
+    parser.add_argument('--json', type=Path, help='write the results to this file')
+    args = parser.parse_args()
+
+    results = []
+    for repo in args.repo:
+        for serving in (False, True):
+            runs = [measure(repo, args.modules, args.load, serving) for _ in range(args.repeat)]
+            best = min(runs, key=lambda run: run['import_s'])
+            results.append({'repo': str(repo), 'serving': serving, **best})
+
+    print(f'\n{"repo":<30} {"serving":>8} {"import s":>9} {"load s":>8} {"RSS MB":>8}  heavy modules')
+    for row in results:
+        load = f'{row["load_s"]:>8.2f}' if row['load_s'] is not None else f'{"-":>8}'
+        print(f'{row["repo"][-30:]:<30} {str(row["serving"]):>8} {row["import_s"]:>9.2f} {load} '
+              f'{row["max_rss_mb"]:>8.0f}  {", ".join(row["heavy"]) or "none"}')
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
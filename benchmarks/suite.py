@@ -0,0 +1,199 @@
+# benchmarks/suite.py
+"""Time the data pipeline, analytics and chart builders on synthetic reviews.
+
+Every step reports its best wall time over --repeat runs and its peak traced memory (tracemalloc,
+measured in one extra run so tracing does not slow down the timed ones). Results go to a JSON
+file; pass an earlier file as --baseline to print the speedup of every step.
+With --models stub (the default) sentiment and lemmatization use cheap stand-ins, so the
+numbers cover the pipeline itself; --models real loads the configured transformer and spaCy models.
+Usage: python -m benchmarks.suite --rows 10000 100000 1000000 --json results.json
+"""
+
+import argparse
+import datetime as dt
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import write_synthetic_csv
+from src.analytics.aggregations import aggregate_by_timeframe, evidence_search, ngram_distribution
+from src.analytics.search_index import SEARCH_INDEX_ATTR, build_search_index
+from src.data_loader import load_data
+from src.nlp.tokens import encode_token_column
+from src.preprocess import clean_data, format_data, tokenize_texts
+from src.sentiment_analysis import analyze_sentiments
+from src.visualizations.plots import (create_main_chart, create_trend_chart, ngram_bar_chart, rating_distribution_chart,
+                                      render_pie_chart)
+
+STUB_STOP_WORDS = {'i', 'w', 'na', 'z', 'do', 'nie', 'się', 'jak', 'to', 'za', 'był', 'była', 'było', 'niż', 'tu'}
+
+
+# --- STUB MODELS ---
+class StubClassifier:
+    """Stand-in for SentimentClassifier labelling texts from a hash of their content."""
+
+    labels = np.array(['Positive', 'Neutral', 'Negative'], dtype=object)
+
+    def predict(self, texts: list[str]) -> tuple[list[str], np.ndarray]:
+        hashes = np.fromiter((zlib.crc32(text.encode('utf-8')) for text in texts), dtype=np.int64, count=len(texts))
+        return self.labels[hashes % 3].tolist(), 0.5 + (hashes % 500) / 1000
+
+
+class _StubToken:
+    __slots__ = ('lemma_', 'is_stop', 'is_alpha')
+
+    def __init__(self, word: str):
+        self.lemma_ = word
+        self.is_stop = word.lower() in STUB_STOP_WORDS
+        self.is_alpha = word.isalpha()
+
+
+class StubNlp:
+    """Stand-in for the spaCy pipeline, splitting on whitespace and punctuation."""
+
+    def __call__(self, text: str) -> list[_StubToken]:
+        return [_StubToken(word.strip('.,!?;:()"\'')) for word in text.split()]
+
+    def pipe(self, texts, batch_size: int = 256, n_process: int = 1):
+        return (self(text) for text in texts)
+
+
+def use_stub_models() -> None:
+    """Swap the sentiment model and the spaCy pipeline for the stubs in this process."""
+    import src.nlp.preprocess
+    import src.sentiment_analysis
+
+    src.sentiment_analysis.get_classifier = lambda *args, **kwargs: StubClassifier()
+    src.nlp.preprocess.load_spacy_lemmatizer = StubNlp
+
+
+# --- MEASUREMENT ---
+def measure(step, repeat: int) -> tuple[float, float, object]:
+    """Best wall time in seconds and peak traced memory in MB of step(), with its last result."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = step()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    step()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak / 1024 ** 2, result
+
+
+def run_suite(csv_path: Path, n_rows: int, repeat: int) -> list[dict]:
+    results = []
+
+    def run(name: str, step):
+        seconds, peak_mb, result = measure(step, repeat)
+        results.append({'rows': n_rows, 'step': name, 'seconds': seconds, 'peak_mb': peak_mb})
+        print(f'{n_rows:>10,} {name:<30} {seconds:>9.3f} {peak_mb:>9.1f}', flush=True)
+        return result
+
+    # --- PIPELINE ---
+    raw = run('load_data', lambda: load_data(csv_path))
+    formatted = run('format_data', lambda: format_data(raw))
+    cleaned = run('clean_data', lambda: clean_data(formatted))
+    tokens = run('tokenize_texts', lambda: tokenize_texts(cleaned))
+    sentiments = run('analyze_sentiments', lambda: analyze_sentiments(cleaned))
+
+    df = (formatted
+          .merge(tokens, on='review_id', how='left')
+          .merge(sentiments, on='review_id', how='left'))
+    df = encode_token_column(df)
+
+    # --- ANALYTICS ---
+    weekly = run('aggregate_by_timeframe[W-MON]', lambda: aggregate_by_timeframe(df, 'W-MON'))
+    run('aggregate_by_timeframe[D]', lambda: aggregate_by_timeframe(df, 'D'))
+    ngrams = run('ngram_distribution', lambda: ngram_distribution(df, top_k=50))
+    # built once like load_enriched_data does, so the searches below time the query alone
+    df.attrs[SEARCH_INDEX_ATTR] = run('build_search_index', lambda: build_search_index(df))
+    sentiments_all = ['Positive', 'Neutral', 'Negative']
+    run('evidence_search[browse]', lambda: evidence_search(df, '', 'Latest', sentiments_all))
+    run('evidence_search[query]', lambda: evidence_search(df, 'obsługa kawa', 'Highest Rating', sentiments_all))
+
+    # --- CHARTS (built and serialized to a Vega-Lite spec, as Streamlit does) ---
+    run('create_main_chart', lambda: create_main_chart(weekly, 'yearweek', color=True).to_dict())
+    run('create_trend_chart', lambda: create_trend_chart(weekly, 'yearweek', 'sentiment_index').to_dict())
+    run('rating_distribution_chart', lambda: rating_distribution_chart(df).to_dict())
+    run('ngram_bar_chart', lambda: ngram_bar_chart(ngrams['2_gram'], color='green').to_dict())
+    run('render_pie_chart', lambda: render_pie_chart(df, 'sentiment_label').to_dict())
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results: list[dict], baseline_path: Path) -> None:
+    baseline = {(row['rows'], row['step']): row for row in json.loads(baseline_path.read_text())['results']}
+    print(f'\nAgainst {baseline_path}:')
+    print(f'{"rows":>10} {"step":<30} {"speedup":>8} {"peak MB ratio":>14}')
+    for row in results:
+        before = baseline.get((row['rows'], row['step']))
+        if before is None:
+            continue
+        memory_ratio = row['peak_mb'] / before['peak_mb'] if before['peak_mb'] else float('nan')
+        print(f'{row["rows"]:>10,} {row["step"]:<30} {before["seconds"] / row["seconds"]:>7.2f}x {memory_ratio:>14.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000], help='dataset sizes to measure')
+    parser.add_argument('--places', type=int, default=100)
+    parser.add_argument('--start', default='2020-01-01', help='first possible publish date')
+    parser.add_argument('--end', default='2025-11-01', help='last possible publish date')
+    parser.add_argument('--models', choices=['stub', 'real'], default='stub')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per step, the fastest is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', type=Path, default=Path('benchmark_results.json'), help='file to write the results to')
+    parser.add_argument('--baseline', type=Path, help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    if args.models == 'stub':
+        use_stub_models()
+
+    results = []
+    print(f'\n{"rows":>10} {"step":<30} {"seconds":>9} {"peak MB":>9}')
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.rows:
+            csv_path = write_synthetic_csv(Path(tmp) / f'reviews_{n_rows}.csv', n_rows, n_places=args.places,
+                                           start=args.start, end=args.end, seed=args.seed)
+            results.extend(run_suite(csv_path, n_rows, args.repeat))
+            csv_path.unlink()
+
+    args.json.write_text(json.dumps({
+        'meta': {
+            'created': dt.datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'models': args.models,
+            'places': args.places,
+            'span': [args.start, args.end],
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': results,
+    }, indent=2))
+    print(f'\nResults written to {args.json}')
+    if args.baseline:
+        print_comparison(results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
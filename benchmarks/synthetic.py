@@ -0,0 +1,190 @@
+# benchmarks/synthetic.py
+"""Generate synthetic Polish reviews with the schema of src/data/reviews.csv.
+
+Places get Zipf-like review counts, ratings follow the sample data and review texts mix
+rating-dependent sentences with free sentences drawn from a Zipfian vocabulary of tens of
+thousands of inflected Polish word forms, up to a log-normal length (median 61 characters, as
+in the sample data). Rows are written in chunks, so millions of reviews fit in bounded memory.
+Usage: python -m benchmarks.synthetic --rows 1000000 --places 500 --start 2019-01-01 --end 2025-11-01 --out reviews_1m.csv
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RATING_PROBS = [0.11, 0.11, 0.10, 0.26, 0.42] # 1..5 stars, as in the sample data
+
+PLACE_TYPES = ['Restauracja', 'Hotel', 'Kawiarnia', 'Pizzeria', 'Bistro', 'Pensjonat', 'Salon', 'Sklep']
+PLACE_NAMES = ['Pod Lipami', 'Morski Widok', 'Stary Młyn', 'Złota Rybka', 'Zielony Ogród', 'Na Rogu', 'Bursztyn',
+               'Pod Kasztanem', 'Smakosz', 'Jantar', 'Mazurek', 'Wierzba', 'Promenada', 'Kameralna', 'Sielanka']
+FIRST_NAMES = ['Anna', 'Marcin', 'Piotr', 'Katarzyna', 'Tomasz', 'Magdalena', 'Paweł', 'Agnieszka', 'Michał',
+               'Joanna', 'Krzysztof', 'Monika', 'Jakub', 'Ewa', 'Łukasz', 'Aleksandra', 'Wojciech', 'Zofia']
+
+# feminine nouns, so every sentence template agrees with them
+SUBJECTS = ['Obsługa', 'Kuchnia', 'Kelnerka', 'Atmosfera', 'Lokalizacja', 'Sala', 'Kawa', 'Pizza', 'Łazienka',
+            'Recepcja', 'Zupa', 'Herbata', 'Muzyka', 'Cena', 'Karta win', 'Okolica']
+SENTENCES = {
+    'positive': ['{s} była naprawdę świetna.', '{s} bez zarzutu, polecam!', 'Absolutnie fantastyczny pobyt.',
+                 'Wszystko smaczne i świeże.', '{s} na najwyższym poziomie.', 'Bardzo miła i pomocna obsługa.',
+                 'Na pewno wrócimy.', 'Czysto, przytulnie i spokojnie.', '{s} zdecydowanie warta swojej ceny.',
+                 'Polecam każdemu, kto szuka dobrego miejsca.', 'Piękny widok z okna.', 'Porcje duże i pyszne.'],
+    'neutral': ['{s} w porządku, nic szczególnego.', 'Było poprawnie.', '{s} mogłaby być lepsza.',
+                'Ceny raczej przeciętne.', 'Czekaliśmy trochę dłużej niż zwykle.', '{s} bez większych zastrzeżeń.',
+                'Miejsce jak wiele innych.', 'Może kiedyś wrócimy.'],
+    'negative': ['{s} była rozczarowująca.', 'Nie polecam.', '{s} pozostawia wiele do życzenia.',
+                 'Czekaliśmy ponad godzinę na zamówienie.', 'Brudno i głośno.', 'Obsługa niemiła i nieuprzejma.',
+                 '{s} zimna i bez smaku.', 'Zdecydowanie za drogo.', 'Więcej tu nie przyjdę.', 'Pokój był zaniedbany.'],
+}
+REPLIES = {
+    'positive': ['Dziękujemy za miłe słowa! Do zobaczenia.', 'Cieszymy się, że wszystko się podobało!',
+                 'Dziękujemy za opinię i zapraszamy ponownie.'],
+    'neutral': ['Dziękujemy za opinię, postaramy się poprawić.', 'Dziękujemy za uwagi, przekażemy je zespołowi.'],
+    'negative': ['Przepraszamy za niedogodności, prosimy o kontakt.', 'Przykro nam, wyjaśnimy sytuację z personelem.',
+                 'Bardzo przepraszamy, to nie powinno się zdarzyć.'],
+}
+
+# Word forms are prefix + stem + ending, ~36k distinct forms ranked in a seeded random order
+STEMS = ['obsług', 'kuchn', 'smak', 'cen', 'pokoj', 'śniadani', 'kaw', 'herbat', 'zup', 'deser', 'ciast', 'mięs',
+         'ryb', 'sałat', 'pierog', 'makaron', 'sos', 'chleb', 'win', 'piw', 'sok', 'lod', 'owoc', 'warzyw', 'kelner',
+         'recepcj', 'personel', 'właściciel', 'kucharz', 'gość', 'stolik', 'krzesł', 'okn', 'widok', 'ogród', 'taras',
+         'parking', 'łazienk', 'prysznic', 'łóżk', 'pościel', 'ręcznik', 'klimatyzacj', 'ogrzewani', 'hałas', 'muzyk',
+         'wystrój', 'atmosfer', 'klimat', 'zapach', 'porcj', 'talerz', 'menu', 'kart', 'zamówieni', 'rachun', 'napiw',
+         'rezerwacj', 'termin', 'godzin', 'minut', 'wieczor', 'poranek', 'weekend', 'urlop', 'wakacj', 'rodzin',
+         'dzieck', 'pies', 'przyjaciel', 'znajom', 'miast', 'plaż', 'mor', 'jezior', 'las', 'gór', 'centr', 'ulic',
+         'dojazd', 'lokalizacj', 'okolic', 'spacer', 'wycieczk', 'basen', 'saun', 'siłowni', 'masaż', 'zabieg',
+         'fryzjer', 'strzyżeni', 'sklep', 'towar', 'produkt', 'jakoś', 'świeżoś', 'czystoś', 'uprzejmoś', 'szybkoś',
+         'spokoj', 'wygod', 'przytuln', 'smaczn', 'pyszn', 'drog', 'tani', 'mił', 'głośn', 'brudn', 'zimn', 'ciepł',
+         'słodk', 'słon', 'kwaśn', 'ostr', 'śwież', 'star', 'now', 'duż', 'mał', 'szybk', 'woln', 'dobr', 'zł']
+PREFIXES = ['', 'prze', 'za', 'po', 'nie', 'wy', 'do', 'na', 'od', 'roz', 'przy', 'u']
+ENDINGS = ['a', 'y', 'ie', 'ę', 'ą', 'om', 'ami', 'ach', 'ów', 'u', 'em', 'owi', 'i', 'ny', 'na', 'ne', 'nego',
+           'nej', 'nym', 'ość', 'ości', 'ować', 'uje', 'ował', 'owała']
+ZIPF_EXPONENT = 1.07 # rank-frequency slope of natural-language word counts
+TEMPLATE_SHARE = 0.5 # share of sentences taken from the rating-dependent templates
+
+
+def _tier(rating: int) -> str:
+    return 'positive' if rating >= 4 else 'neutral' if rating == 3 else 'negative'
+
+
+def _vocabulary(rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    """Distinct word forms in a random rank order and their Zipfian probabilities."""
+    words = np.array(sorted({prefix + stem + ending for prefix in PREFIXES for stem in STEMS for ending in ENDINGS}),
+                     dtype=object)
+    rng.shuffle(words)
+    probs = 1 / np.arange(1, len(words) + 1) ** ZIPF_EXPONENT
+    return words, probs / probs.sum()
+
+
+def _text_pool(rng: np.random.Generator, tier: str, size: int, median_chars: float, sigma: float,
+               words: np.ndarray, word_probs: np.ndarray) -> np.ndarray:
+    """Distinct review texts of one rating tier with log-normal lengths."""
+    targets = rng.lognormal(np.log(median_chars), sigma, size).clip(15, 2000)
+    sentences = SENTENCES[tier]
+    # one draw for the whole pool, consumed in order; a word averages ~9 characters
+    draws = rng.choice(words, size=int(targets.sum() / 9) + 16, p=word_probs)
+    position = 0
+    texts = []
+    for target in targets:
+        parts, length = [], 0
+        while True:
+            if rng.random() < TEMPLATE_SHARE:
+                sentence = sentences[rng.integers(len(sentences))].format(s=SUBJECTS[rng.integers(len(SUBJECTS))])
+            else:
+                n_words = int(rng.integers(2, 8))
+                if position + n_words > len(draws):
+                    position = 0
+                sentence = ' '.join(draws[position:position + n_words]).capitalize() + '.'
+                position += n_words
+            # the sentence that would overshoot the target length is left out
+            if parts and length + len(sentence) > target:
+                break
+            parts.append(sentence)
+            length += len(sentence) + 1
+        texts.append(' '.join(parts))
+    return np.array(texts, dtype=object)
+
+
+def _iso(times: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(times.astype('datetime64[s]'), unit='s').astype(object) + 'Z'
+
+
+def iter_synthetic_reviews(n_rows: int, n_places: int = 100, start: str = '2020-01-01', end: str = '2025-11-01',
+                           reply_rate: float = 0.45, empty_rate: float = 0.07, median_chars: float = 61,
+                           length_sigma: float = 0.8, pool_size: int = 50_000, chunk_rows: int = 500_000,
+                           seed: int = 0):
+    """Yield DataFrames of synthetic reviews in chunks of at most chunk_rows rows."""
+    rng = np.random.default_rng(seed)
+    place_ids = np.array([f'place_{i:05d}' for i in range(n_places)], dtype=object)
+    place_names = np.array([f"{PLACE_TYPES[i % len(PLACE_TYPES)]} '{PLACE_NAMES[i % len(PLACE_NAMES)]}'"
+                            + (f' {i // len(PLACE_NAMES) + 1}' if i >= len(PLACE_NAMES) else '')
+                            for i in range(n_places)], dtype=object)
+    popularity = 1 / np.arange(1, n_places + 1) ** 0.8
+    popularity /= popularity.sum()
+    words, word_probs = _vocabulary(rng)
+    pools = {tier: _text_pool(rng, tier, min(pool_size, max(n_rows, 1)), median_chars, length_sigma, words, word_probs)
+             for tier in SENTENCES}
+    replies = {tier: np.array(texts, dtype=object) for tier, texts in REPLIES.items()}
+    authors = np.array([f'{name} {letter}.' for name in FIRST_NAMES for letter in 'ABCDEFGHIJKLMNOPRSTWZ'], dtype=object)
+    start_s = np.datetime64(start, 's').astype(np.int64)
+    end_s = np.datetime64(end, 's').astype(np.int64)
+
+    for chunk_start in range(0, n_rows, chunk_rows):
+        n = min(chunk_rows, n_rows - chunk_start)
+        places = rng.choice(n_places, size=n, p=popularity)
+        ratings = rng.choice(np.arange(1, 6), size=n, p=RATING_PROBS)
+        tiers = np.array([_tier(rating) for rating in range(6)], dtype=object)[ratings]
+        texts = np.empty(n, dtype=object)
+        reply_texts = np.full(n, None, dtype=object)
+        for tier in SENTENCES:
+            rows = np.flatnonzero(tiers == tier)
+            texts[rows] = pools[tier][rng.integers(len(pools[tier]), size=len(rows))]
+            reply_texts[rows] = replies[tier][rng.integers(len(replies[tier]), size=len(rows))]
+        texts[rng.random(n) < empty_rate] = None
+        publish = rng.integers(start_s, end_s, size=n).astype('datetime64[s]')
+        has_reply = rng.random(n) < reply_rate
+        reply_times = publish + rng.exponential(24 * 3600, size=n).astype('timedelta64[s]')
+        yield pd.DataFrame({
+            'review_id': [f'rev_{i:09d}' for i in range(chunk_start, chunk_start + n)],
+            'place_id': place_ids[places],
+            'place_name': place_names[places],
+            'author_name': authors[rng.integers(len(authors), size=n)],
+            'rating': ratings,
+            'review_text': texts,
+            'publish_time': _iso(publish),
+            'reply_text': np.where(has_reply, reply_texts, None),
+            'reply_publish_time': np.where(has_reply, _iso(reply_times), None),
+        })
+
+
+def write_synthetic_csv(path: Path, n_rows: int, **options) -> Path:
+    """Write n_rows synthetic reviews to a CSV file, chunk by chunk."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for i, chunk in enumerate(iter_synthetic_reviews(n_rows, **options)):
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--places', type=int, default=100)
+    parser.add_argument('--start', default='2020-01-01', help='first possible publish date')
+    parser.add_argument('--end', default='2025-11-01', help='last possible publish date')
+    parser.add_argument('--reply-rate', type=float, default=0.45, help='share of reviews with an owner reply')
+    parser.add_argument('--empty-rate', type=float, default=0.07, help='share of rating-only reviews without text')
+    parser.add_argument('--median-chars', type=float, default=61, help='median review length in characters')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', type=Path, required=True, help='CSV file to write')
+    args = parser.parse_args()
+
+    write_synthetic_csv(args.out, args.rows, n_places=args.places, start=args.start, end=args.end,
+                        reply_rate=args.reply_rate, empty_rate=args.empty_rate, median_chars=args.median_chars,
+                        seed=args.seed)
+    print(f'{args.rows:,} reviews over {args.places} places written to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
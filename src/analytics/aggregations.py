@@ -1,23 +1,35 @@
 # src/analytics/aggregations.py
 
+import numpy as np
 import pandas as pd
 
-from collections import Counter
-
-from src.nlp.preprocess import preprocess_text, extract_ngrams
+from src.config import EVIDENCE_PAGE_SIZE, SEMANTIC_MAX_RESULTS, SERVING_MODE
+from src.analytics.search_index import get_search_index, top_rows
+from src.embeddings import embed_query, load_embedding_index
+from src.nlp.preprocess import preprocess_text
+from src.nlp.query import lexicon_tokens
+from src.nlp.tokens import get_token_corpus
 
 from src.utils.logger import get_logger
 logger = get_logger(__name__)
 
+NGRAM_SCAN_CHUNK = 1 << 16
 
-def aggregate_by_timeframe(df: pd.DataFrame, freq: str) -> pd.DataFrame:
-    """Aggregate data by the specified timeframe frequency."""
+
+ROLLUP_METRICS = ['n_reviews', 'n_analyzed', 'rating', 'Positive', 'Neutral', 'Negative',
+                  'sentiment_score', 'weighted_sentiment']
+RATING_COUNT_COLUMNS = [f'rating_{value}' for value in range(1, 6)] # reviews per star rating, for the KPI cards
+
+
+def build_daily_rollup(df: pd.DataFrame) -> pd.DataFrame:
+    """Sum the review metrics per place and day, the base of every timeframe aggregation."""
     
-    logger.info(f"Aggregating data with frequency: {freq}")
-    df = df.copy()
+    logger.info("Building daily rollup...")
+    # compacted frames store scores as float32, sum them in float64
+    df = df.astype({'sentiment_score': 'float64', 'weighted_sentiment': 'float64'})
 
-    if df.index.name != 'publish_time':
-        df = df.set_index('publish_time')
+    if df.index.name == 'publish_time':
+        df = df.reset_index()
     df['n_reviews'] = 1
 
     # one_hot = (
@@ -26,17 +38,45 @@ def aggregate_by_timeframe(df: pd.DataFrame, freq: str) -> pd.DataFrame:
     # )
     # df = pd.concat([df, one_hot], axis=1)
     df['n_analyzed'] = df['review_text'].notnull().astype(int)
+    df['publish_time'] = df['publish_time'].dt.floor('D')
+    for value, column in enumerate(RATING_COUNT_COLUMNS, start=1):
+        df[column] = (df['rating'] == value).astype(int)
+
+    keys = ['place_id', 'publish_time'] if 'place_id' in df.columns else ['publish_time']
+    rollup = (df
+              .groupby(keys, observed=True, dropna=False)[ROLLUP_METRICS + RATING_COUNT_COLUMNS]
+              .sum()
+              .reset_index())
+    rollup = rollup[rollup['publish_time'].notnull()].reset_index(drop=True)
+    rollup.attrs = {} # groupby keeps the review indexes in attrs, they do not describe the rollup
+    logger.info(f"Daily rollup has {len(rollup)} records.")
+    return rollup
+
+
+def select_rollup(rollup: pd.DataFrame, place_ids, start_date, end_date) -> pd.DataFrame:
+    """Rollup rows of the given places within the inclusive date range."""
+    
+    days = rollup['publish_time'].dt.date
+    return rollup[
+        rollup['place_id'].isin(place_ids)
+        & (days >= start_date)
+        & (days <= end_date)
+    ]
 
-    agg_dict = {
-        'n_reviews': 'sum',
-        'n_analyzed': 'sum',
-        'rating': 'sum',
-        'Positive': 'sum',
-        'Neutral': 'sum',
-        'Negative': 'sum',
-        'sentiment_score': 'sum',
-        'weighted_sentiment': 'sum'
-    }
+
+def aggregate_by_timeframe(df: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """Aggregate data by the specified timeframe frequency."""
+    
+    return aggregate_rollup(build_daily_rollup(df), freq)
+
+
+def aggregate_rollup(rollup: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """Aggregate a daily rollup by the specified timeframe frequency."""
+    
+    logger.info(f"Aggregating data with frequency: {freq}")
+    df = rollup.set_index('publish_time')
+
+    agg_dict = {metric: 'sum' for metric in ROLLUP_METRICS}
 
     # --- RESAMPLE AND AGGREGATE ---
     df_resampled = df.resample(freq).agg(agg_dict)
@@ -66,56 +106,156 @@ def aggregate_by_timeframe(df: pd.DataFrame, freq: str) -> pd.DataFrame:
 
     return df_resampled
 
-def ngram_distribution(df: pd.DataFrame) -> dict:
-    """Calculate n-gram distribution from the tokenized texts."""
+def ngram_keys(corpus, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Encode every n-gram inside a row as one int64 key (base = vocabulary size).
+
+    Returns the keys and the start position of each n-gram in the corpus.
+    """
+    base = max(len(corpus.vocab), 1)
+    if base ** n > np.iinfo(np.int64).max:
+        raise OverflowError(f'Vocabulary of {base} lemmas is too large to encode {n}-grams in int64 keys')
+    # n-gram starts: every position except the last n - 1 of each row
+    is_start = np.ones(len(corpus.ids), dtype=bool)
+    row_starts, row_ends = corpus.offsets[:-1], corpus.offsets[1:]
+    for k in range(1, n):
+        tail = row_ends - k
+        is_start[tail[tail >= row_starts]] = False
+    starts = np.flatnonzero(is_start)
+    keys = np.zeros(len(starts), dtype=np.int64)
+    for k in range(n):
+        keys = keys * base + corpus.ids[starts + k]
+    return keys, starts
+
+def decode_ngram_keys(vocab: list[str], keys: np.ndarray, n: int) -> list[tuple]:
+    """Decode int64 n-gram keys back to tuples of lemmas."""
+    base = max(len(vocab), 1)
+    digits = []
+    for _ in range(n):
+        digits.append(keys % base)
+        keys = keys // base
+    return [tuple(vocab[i] for i in ids) for ids in zip(*(d.tolist() for d in reversed(digits)))]
+
+def top_key_counts(keys: np.ndarray, top_k: int | None) -> tuple[np.ndarray, np.ndarray]:
+    """Count keys and return the top_k most common, ties in order of first occurrence (as Counter.most_common)."""
+    sorted_keys = np.sort(keys)
+    is_first = np.ones(len(sorted_keys), dtype=bool)
+    is_first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    run_starts = np.flatnonzero(is_first)
+    unique_keys = sorted_keys[run_starts]
+    counts = np.diff(np.append(run_starts, len(sorted_keys)))
+    if top_k is not None and 0 < top_k < len(counts):
+        # every key tied with the k-th largest count is kept, the tie-break below picks among them
+        threshold = np.partition(counts, len(counts) - top_k)[len(counts) - top_k]
+        keep = counts >= threshold
+        unique_keys, counts = unique_keys[keep], counts[keep]
+
+    # first occurrence of each remaining key, scanning in chunks until every key is found
+    # (common n-grams show up early); on repeated indices the last (= earliest, reversed) write wins
+    first_index = np.full(len(unique_keys), -1, dtype=np.int64)
+    for chunk_start in range(0, len(keys), NGRAM_SCAN_CHUNK):
+        pending = np.flatnonzero(first_index < 0)
+        if not len(pending):
+            break
+        chunk = keys[chunk_start:chunk_start + NGRAM_SCAN_CHUNK]
+        targets = unique_keys[pending]
+        slots = np.minimum(np.searchsorted(targets, chunk), len(targets) - 1)
+        hits = np.flatnonzero(targets[slots] == chunk)
+        found = np.full(len(targets), -1, dtype=np.int64)
+        found[slots[hits][::-1]] = hits[::-1] + chunk_start
+        first_index[pending] = found
+
+    order = np.lexsort((first_index, -counts))[:top_k]
+    return unique_keys[order], counts[order]
+
+def ngram_distribution(df: pd.DataFrame, top_k: int | None = None) -> dict:
+    """Calculate n-gram distribution from the tokenized texts, keeping the top_k most common per n."""
     logger.info("Calculating n-gram distribution...")
     results = {}
-    df = df[df['clean_tokens'].notnull()].copy()
+    corpus = get_token_corpus(df)
     for n in range(1, 4):
-        ngram_series = df['clean_tokens'].apply(lambda x: extract_ngrams(x, n))
-        all_ngrams = [ngram for row in ngram_series for ngram in row]
-        counts = Counter(all_ngrams)
-        counts = counts.most_common()
-        ngrams_counts = {'ngram': [ng for ng, c in counts], 'count': [c for ng, c in counts]}
+        keys, _ = ngram_keys(corpus, n)
+        top_keys, counts = top_key_counts(keys, top_k)
+        ngrams_counts = {
+            'ngram': decode_ngram_keys(corpus.vocab, top_keys, n),
+            'count': counts.tolist()
+        }
         
-        # df_counts = (
-        #     pd.DataFrame(counts.items(), columns=['ngram', 'count'])
-        #     .sort_values('count', ascending=False)
-        #     .reset_index(drop=True)
-        # )
         results[f'{n}_gram'] = ngrams_counts
-        logger.info(f"Calculated {len(ngrams_counts['ngram'])} unique {n}-grams.")
+        logger.info(f"Counted {len(keys)} {n}-grams, returning the top {len(ngrams_counts['ngram'])}.")
     return results
 
-def evidence_search(df: pd.DataFrame, text, sort_by, filter) -> pd.DataFrame:
-    '''Search evidence quotes based on the text, sort and filter criteria.'''
-    logger.info("Performing evidence search...")
-    df = df[df['review_text'].notnull()].copy()
-    query_tokens = preprocess_text(text)['clean_tokens']
-    if query_tokens:
-        query_counter = Counter(query_tokens)
-        total_query_tokens = sum(query_counter.values())
-        df['match_score'] = df['clean_tokens'].apply(
-            lambda tokens: sum((Counter(tokens) & query_counter).values()) / total_query_tokens if tokens else 0.0
-        )
+def _sort_keys(df: pd.DataFrame, rows: np.ndarray, sort_by: str) -> np.ndarray:
+    """Ascending sort keys of the given rows for the Evidence Explorer order, missing values last."""
+    if sort_by == 'Latest':
+        times = df['publish_time'].values[rows]
+        return np.where(np.isnat(times), np.iinfo(np.int64).max, -times.view(np.int64))
+    ratings = df['rating'].to_numpy(dtype=np.float64, na_value=np.nan)[rows]
+    keys = -ratings if sort_by == 'Highest Rating' else ratings
+    return np.nan_to_num(keys, nan=np.inf)
+
+def _keyword_matches(index, doc_ids: np.ndarray, allowed: np.ndarray, query_tokens: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Allowed rows of the frame (doc_ids[row] = doc) with the number of query terms each contains and its BM25 score.
+
+    Rows without a query term are kept with zeros, as the last level.
+    """
+    docs, n_terms, scores = index.score(query_tokens)
+    rows = np.flatnonzero(allowed[doc_ids])
+    positions = np.full(len(index), -1, dtype=np.int64)
+    positions[doc_ids[rows]] = np.arange(len(rows))
+    matched = positions[docs]
+    keep = matched >= 0
+    levels, relevance = np.zeros(len(rows), dtype=np.int64), np.zeros(len(rows))
+    levels[matched[keep]] = n_terms[keep]
+    relevance[matched[keep]] = scores[keep]
+    return rows, levels, relevance
+
+def _query_tokens(index, text: str) -> list[str]:
+    """Lemmas of the query, from spaCy or, in serving mode, from the index vocabulary."""
+    if SERVING_MODE:
+        return lexicon_tokens(text, index.vocab_index, index.sorted_vocab)
+    return preprocess_text(text)['clean_tokens']
+
+def _semantic_matches(df: pd.DataFrame, text: str, allowed_rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Rows of df nearest to the query in embedding space with their cosine similarities."""
+    index = load_embedding_index()
+    if index is None:
+        logger.warning("No review embeddings found, semantic search returns nothing")
+        return np.array([], dtype=np.int64), np.array([])
+    matrix_rows = index.rows_of(df['review_id'].to_numpy()[allowed_rows])
+    embedded = matrix_rows >= 0
+    positions, scores = index.search(embed_query(text), matrix_rows[embedded], SEMANTIC_MAX_RESULTS)
+    return allowed_rows[embedded][positions], scores
+
+def evidence_search(df: pd.DataFrame, text, sort_by, filter, page: int = 0, page_size: int = EVIDENCE_PAGE_SIZE,
+                    mode: str = 'Keyword') -> tuple[pd.DataFrame, int]:
+    '''Search evidence quotes based on the text, sort and filter criteria.
+
+    Keyword results are grouped by how many query terms they contain, sorted by the sort
+    criterion within a group and by BM25 among ties; reviews without a query term come last.
+    Semantic matches are ranked by embedding similarity, then by the sort criterion. Returns
+    the requested page of results and the total number of results.
+    '''
+    logger.info(f"Performing {mode.lower()} evidence search...")
+    index, doc_ids = get_search_index(df)
+    allowed = index.has_text & index.sentiment_mask(filter)
+    query_tokens = _query_tokens(index, text) if mode != 'Semantic' else None
+    relevance = None
+    if mode == 'Semantic' and text.strip():
+        rows, scores = _semantic_matches(df, text, np.flatnonzero(allowed[doc_ids]))
+        # ties keep the frame order
+        order = np.argsort(rows, kind='stable')
+        rows, scores = rows[order], scores[order]
+    elif query_tokens:
+        rows, scores, relevance = _keyword_matches(index, doc_ids, allowed, query_tokens)
     else:
-        df['match_score'] = 0.0
-    
-    # Filter by sentiment first (before sorting)
-    df = df[df['sentiment_label'].isin(filter)]
-    
-    sortby_map = {
-        'Latest': ('publish_time', False),
-        'Highest Rating': ('rating', False),
-        'Lowest Rating': ('rating', True)
-    }
-    col, asc = sortby_map[sort_by]
-    res = (df
-    .sort_values(['match_score', col], ascending=[False, asc])
-    .reset_index(drop=True)
-    )
-    logger.info(f"Evidence search found {len(res)} matching records.")
-    return res[['review_text', 'rating', 'publish_time', 'sentiment_label']]
+        rows = np.flatnonzero(allowed[doc_ids])
+        scores = np.zeros(len(rows))
+
+    top = top_rows(scores, _sort_keys(df, rows, sort_by), (page + 1) * page_size, relevance)[page * page_size:]
+    res = df.iloc[rows[top]].reset_index(drop=True)[['review_text', 'rating', 'publish_time', 'sentiment_label']]
+    res.attrs = {} # a page of results for display, the indexes of the full frame do not describe it
+    logger.info(f"Evidence search found {len(rows)} matching records.")
+    return res, len(rows)
 
     
 
@@ -0,0 +1,110 @@
+# src/analytics/kpi_index.py
+
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.aggregations import ROLLUP_METRICS, RATING_COUNT_COLUMNS
+
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+EPOCH = dt.date(1970, 1, 1)
+
+
+def _day_number(date: dt.date) -> int:
+    return (date - EPOCH).days
+
+
+class KpiIndex:
+    """Prefix sums of the daily rollup metrics per place.
+
+    The sum of any metric over an inclusive date range is two binary searches and one
+    subtraction per place, independent of how much history a place has.
+    """
+
+    def __init__(self, days: dict[str, np.ndarray], prefix: dict[str, np.ndarray], metrics: list[str]):
+        self.days = days # place_id -> sorted day numbers
+        self.prefix = prefix # place_id -> (len(days) + 1, len(metrics)) running totals starting at 0
+        self.metrics = metrics
+
+    @classmethod
+    def from_rollup(cls, rollup: pd.DataFrame) -> 'KpiIndex':
+        metrics = ROLLUP_METRICS + [col for col in RATING_COUNT_COLUMNS if col in rollup.columns]
+        days, prefix = {}, {}
+        # calendar days as shown by the filters, so local dates of tz-aware times
+        day_numbers = (rollup['publish_time'].dt.tz_localize(None) - pd.Timestamp(EPOCH)) // pd.Timedelta(days=1)
+        rollup = rollup.assign(day=day_numbers.to_numpy()).sort_values(['place_id', 'day'])
+        for place_id, group in rollup.groupby('place_id', observed=True, sort=False):
+            values = group[metrics].to_numpy(dtype=np.float64)
+            days[str(place_id)] = group['day'].to_numpy(dtype=np.int64)
+            prefix[str(place_id)] = np.vstack([np.zeros(len(metrics)), np.cumsum(values, axis=0)])
+        logger.info(f"KPI index built for {len(days)} places.")
+        return cls(days, prefix, metrics)
+
+    def totals(self, place_ids, start_date: dt.date, end_date: dt.date) -> pd.Series:
+        """Metric sums over the places and inclusive date range."""
+        total = np.zeros(len(self.metrics))
+        start, end = _day_number(start_date), _day_number(end_date)
+        for place_id in place_ids:
+            days = self.days.get(str(place_id))
+            if days is None:
+                continue
+            lo, hi = np.searchsorted(days, [start, end + 1])
+            total += self.prefix[str(place_id)][hi] - self.prefix[str(place_id)][lo]
+        return pd.Series(total, index=self.metrics)
+
+    def last_day(self, place_ids, start_date: dt.date, end_date: dt.date) -> dt.date | None:
+        """Latest day with reviews within the range, if any."""
+        start, end = _day_number(start_date), _day_number(end_date)
+        last = None
+        for place_id in place_ids:
+            days = self.days.get(str(place_id))
+            if days is None:
+                continue
+            hi = np.searchsorted(days, end + 1)
+            if hi and days[hi - 1] >= start:
+                last = days[hi - 1] if last is None else max(last, days[hi - 1])
+        return None if last is None else EPOCH + dt.timedelta(days=int(last))
+
+
+def kpis_from_totals(totals: pd.Series) -> dict:
+    """KPI values as defined by the cumulative columns of aggregate_rollup (NaN when undefined)."""
+
+    def ratio(numerator: str, denominator: str) -> float:
+        return totals[numerator] / totals[denominator] if totals[denominator] else np.nan
+
+    score_sum = totals['sentiment_score']
+    return {
+        'cum_reviews': int(totals['n_reviews']),
+        'avg_rating': ratio('rating', 'n_reviews'),
+        'sentiment_index': (totals['weighted_sentiment'] / score_sum + 1) * 50 if score_sum else np.nan,
+        'positive_ratio': ratio('Positive', 'n_analyzed'),
+        'neutral_ratio': ratio('Neutral', 'n_analyzed'),
+        'negative_ratio': ratio('Negative', 'n_analyzed'),
+    }
+
+
+def range_kpis(index: KpiIndex, place_ids, start_date: dt.date, end_date: dt.date, freq: str) -> dict | None:
+    """KPI card values for a selection, as the last row of aggregate_rollup(..., freq) would give them.
+
+    'previous' holds the values at the end of the period before the last one, which is what
+    calculate_delta compares against; it is None when there is no such period with data.
+    """
+    last_day = index.last_day(place_ids, start_date, end_date)
+    if last_day is None:
+        return None
+    totals = index.totals(place_ids, start_date, last_day)
+
+    # the bucket holding last_day ends on offset.rollforward(last_day), the previous one a period earlier
+    offset = pd.tseries.frequencies.to_offset(freq)
+    previous_end = (offset.rollforward(pd.Timestamp(last_day)) - offset).date()
+    previous = None
+    if previous_end >= start_date:
+        previous_totals = index.totals(place_ids, start_date, previous_end)
+        if previous_totals['n_reviews']:
+            previous = kpis_from_totals(previous_totals)
+
+    rating_counts = {int(col.split('_')[1]): int(totals[col]) for col in RATING_COUNT_COLUMNS if col in totals.index}
+    return {'current': kpis_from_totals(totals), 'previous': previous, 'rating_counts': rating_counts}
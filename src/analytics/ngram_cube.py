@@ -0,0 +1,184 @@
+# src/analytics/ngram_cube.py
+
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.aggregations import ngram_distribution, ngram_keys, decode_ngram_keys, top_key_counts
+from src.nlp.tokens import CORPUS_ATTR, TOKEN_ROW, TokenCorpus, get_token_corpus
+
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+NGRAM_CUBE_ATTR = 'ngram_cube' # key of the NgramCube in DataFrame.attrs
+SENTIMENTS = ['Positive', 'Neutral', 'Negative']
+EPOCH = dt.date(1970, 1, 1)
+MIN_COUNT = 10 # n-grams rarer than this in the whole dataset are left out of the cube
+
+
+def _utc_days(times: pd.Series) -> np.ndarray:
+    """Days since EPOCH of the (UTC) publish dates, -1 where the time is missing."""
+    days = times.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+    return np.where(np.isnat(days), -1, days.astype(np.int64))
+
+
+def _month_start(month: int) -> int:
+    """Day number of the first day of a month counted from EPOCH."""
+    return (dt.date(EPOCH.year + month // 12, month % 12 + 1, 1) - EPOCH).days
+
+
+def _days_to_months(days: np.ndarray) -> np.ndarray:
+    return (np.datetime64(EPOCH, 'D') + days).astype('datetime64[M]').astype(np.int64)
+
+
+class NgramCube:
+    """Counts of the dataset's frequent n-grams pre-aggregated per (sentiment, place, month, n).
+
+    Only n-grams seen at least MIN_COUNT times in the whole dataset are kept, as dense codes into
+    the sorted frequent keys: with per-day or unpruned cells nearly every entry held a single
+    occurrence, so the cube was larger and slower than counting the tokens. A selection sums the
+    months it fully covers with one bincount and counts its partial edge months from the tokens.
+    A pruned n-gram occurs fewer than MIN_COUNT times in any selection, so the result is exact
+    when the top_k-th count reaches MIN_COUNT; otherwise (small selections, where counting is
+    cheap anyway) the tokens are counted. Each entry keeps the corpus position of the n-gram's
+    first occurrence, so ties rank exactly as in ngram_distribution over the same reviews.
+    """
+
+    def __init__(self, corpus: TokenCorpus, place_ids: list[str], frequent: dict[int, np.ndarray],
+                 tables: dict[int, dict[str, np.ndarray]]):
+        self.corpus = corpus # the reviews' token_row points into it, first positions index its ids
+        self.place_codes = {place_id: code for code, place_id in enumerate(place_ids)}
+        self.frequent = frequent # sorted keys of the frequent n-grams, 'code' indexes them
+        self.tables = tables
+
+    def __deepcopy__(self, memo):
+        return self # immutable, pandas deep-copies attrs on every slice
+
+    def nbytes(self) -> int:
+        # the corpus is the TokenCorpus in attrs, counted there
+        return (sum(array.nbytes for table in self.tables.values() for array in table.values())
+                + sum(keys.nbytes for keys in self.frequent.values()))
+
+    def _select(self, n: int, sentiment: str, place_ids, first_month: int, last_month: int) -> np.ndarray:
+        """Entry positions of the selected cells."""
+        table = self.tables[n]
+        months, block_starts = table['month'], table['block_starts']
+        bounds = np.array([first_month, last_month + 1], dtype=months.dtype)
+        slices = []
+        for place_id in place_ids:
+            if place_id not in self.place_codes:
+                continue
+            block = SENTIMENTS.index(sentiment) * len(self.place_codes) + self.place_codes[place_id]
+            lo, hi = block_starts[block], block_starts[block + 1]
+            first, last = np.searchsorted(months[lo:hi], bounds)
+            slices.append(np.arange(lo + first, lo + last))
+        return np.concatenate(slices) if slices else np.array([], dtype=np.int64)
+
+    def _edge_ngrams(self, edge_rows: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+        """Codes and corpus positions of the frequent n-grams in the given corpus rows."""
+        edges = self.corpus.take(edge_rows)
+        keys, starts = ngram_keys(edges, n)
+        frequent = self.frequent[n]
+        codes = np.minimum(np.searchsorted(frequent, keys), max(len(frequent) - 1, 0))
+        is_frequent = frequent[codes] == keys if len(frequent) else np.zeros(len(keys), dtype=bool)
+        codes, starts = codes[is_frequent], starts[is_frequent]
+        rows = np.searchsorted(edges.offsets, starts, side='right') - 1
+        return codes, self.corpus.offsets[edge_rows[rows]] + starts - edges.offsets[rows]
+
+    def _count_tokens(self, rows: np.ndarray, n: int, top_k: int) -> dict:
+        keys, _ = ngram_keys(self.corpus.take(rows), n)
+        top_keys, counts = top_key_counts(keys, top_k)
+        return {'ngram': decode_ngram_keys(self.corpus.vocab, top_keys, n), 'count': counts.tolist()}
+
+    def top_ngrams(self, n: int, rows: np.ndarray, lengths: np.ndarray, edge_rows: np.ndarray, sentiment: str, place_ids,
+                   first_month: int, last_month: int, top_k: int) -> dict:
+        """Most common n-grams of the corpus rows: the cube's full months plus the edge rows, or their tokens."""
+        if np.maximum(lengths - n + 1, 0).sum() < top_k * MIN_COUNT:
+            return self._count_tokens(rows, n, top_k) # too few n-grams for the cube to be exact
+        table = self.tables[n]
+        selected = self._select(n, sentiment, place_ids, first_month, last_month)
+        edge_codes, edge_positions = self._edge_ngrams(edge_rows, n)
+        n_keys = len(self.frequent[n])
+        counts = (np.bincount(table['code'][selected], weights=table['count'][selected], minlength=n_keys).astype(np.int64)
+                  + np.bincount(edge_codes, minlength=n_keys))
+        present = np.flatnonzero(counts)
+        if len(present) < top_k:
+            return self._count_tokens(rows, n, top_k) # a pruned n-gram could rank
+        threshold = np.partition(counts[present], len(present) - top_k)[len(present) - top_k]
+        if threshold < MIN_COUNT:
+            return self._count_tokens(rows, n, top_k)
+        candidates = present[counts[present] >= threshold]
+        codes = np.concatenate([table['code'][selected], edge_codes])
+        positions = np.concatenate([table['first'][selected], edge_positions])
+        is_candidate = np.zeros(n_keys, dtype=bool)
+        is_candidate[candidates] = True
+        in_candidates = is_candidate[codes]
+        first = np.full(n_keys, np.iinfo(np.int64).max)
+        np.minimum.at(first, codes[in_candidates], positions[in_candidates])
+        # most common first, ties in order of first occurrence (as Counter.most_common)
+        ranked = candidates[np.lexsort((first[candidates], -counts[candidates]))[:top_k]]
+        return {
+            'ngram': decode_ngram_keys(self.corpus.vocab, self.frequent[n][ranked], n),
+            'count': counts[ranked].tolist()
+        }
+
+    def ngram_distribution(self, df: pd.DataFrame, sentiment: str, place_ids, start_date: dt.date, end_date: dt.date,
+                           top_k: int | None = None) -> dict:
+        """Same result as ngram_distribution(df), df being the reviews of the selection with the sentiment."""
+        # the full distribution needs the pruned n-grams too
+        if top_k is None or TOKEN_ROW not in df.columns or df.attrs.get(CORPUS_ATTR) is not self.corpus:
+            return ngram_distribution(df, top_k=top_k)
+        rows = df[TOKEN_ROW].to_numpy()
+        start_day, end_day = (start_date - EPOCH).days, (end_date - EPOCH).days
+        first_month, last_month = _days_to_months(np.array([start_day, end_day]))
+        if _month_start(first_month) < start_day:
+            first_month += 1
+        if _month_start(last_month + 1) - 1 > end_day:
+            last_month -= 1
+        days = _utc_days(df['publish_time'])
+        edge_rows = rows[(days < _month_start(first_month)) | (days >= _month_start(last_month + 1))]
+        lengths = self.corpus.lengths[rows]
+        return {f'{n}_gram': self.top_ngrams(n, rows, lengths, edge_rows, sentiment, place_ids, first_month, last_month, top_k)
+                for n in self.tables}
+
+
+def build_ngram_cube(df: pd.DataFrame) -> NgramCube:
+    """Count the frequent n-grams of the tokenized reviews once per (sentiment, place, month) cell."""
+    logger.info("Building n-gram count cube...")
+    corpus = get_token_corpus(df)
+    place_codes, place_ids = pd.factorize(df['place_id'].astype(str))
+    sentiment_codes = pd.Categorical(df['sentiment_label'], categories=SENTIMENTS).codes
+    days = _utc_days(df['publish_time'])
+    valid = (sentiment_codes >= 0) & (days >= 0)
+    months = _days_to_months(np.where(valid, days, 0))
+    blocks = sentiment_codes.astype(np.int64) * len(place_ids) + place_codes
+
+    frequent, tables = {}, {}
+    for n in range(1, 4):
+        keys, starts = ngram_keys(corpus, n)
+        rows = np.searchsorted(corpus.offsets, starts, side='right') - 1
+        keys, starts, rows = keys[valid[rows]], starts[valid[rows]], rows[valid[rows]]
+        unique_keys, codes, key_counts = np.unique(keys, return_inverse=True, return_counts=True)
+        is_frequent = key_counts >= MIN_COUNT
+        frequent[n] = unique_keys[is_frequent]
+        keep = is_frequent[codes]
+        codes = (np.cumsum(is_frequent) - 1)[codes[keep]] # dense codes into frequent[n]
+        starts, rows = starts[keep], rows[keep]
+        order = np.lexsort((starts, codes, months[rows], blocks[rows]))
+        codes, starts, rows = codes[order], starts[order], rows[order]
+        is_new = np.ones(len(codes), dtype=bool)
+        is_new[1:] = (codes[1:] != codes[:-1]) | (months[rows][1:] != months[rows][:-1]) | (blocks[rows][1:] != blocks[rows][:-1])
+        run_starts = np.flatnonzero(is_new)
+        tables[n] = {
+            # entries of block b are block_starts[b]:block_starts[b + 1]
+            'block_starts': np.searchsorted(blocks[rows][run_starts], np.arange(len(SENTIMENTS) * len(place_ids) + 1)),
+            'month': months[rows][run_starts].astype(np.int16),
+            'code': codes[run_starts].astype(np.int32),
+            'count': np.diff(np.append(run_starts, len(codes))).astype(np.int32),
+            # sorted by position within a run, so this is the earliest
+            'first': starts[run_starts].astype(np.int32 if len(corpus.ids) < 2 ** 31 else np.int64),
+        }
+        logger.info(f"Cube holds {len(run_starts)} cells of {len(frequent[n])} frequent {n}-grams "
+                    f"({len(codes)} of {len(keys)} occurrences).")
+    return NgramCube(corpus, list(place_ids), frequent, tables)
@@ -0,0 +1,130 @@
+# src/analytics/search_index.py
+
+from collections import Counter
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from src.nlp.tokens import TOKEN_ROW, get_token_corpus
+
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+SEARCH_INDEX_ATTR = 'search_index' # key of the SearchIndex in DataFrame.attrs
+SENTIMENTS = ['Positive', 'Neutral', 'Negative']
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+class SearchIndex:
+    """Inverted index of the review lemmas with precomputed BM25 weights.
+
+    The postings of term t are docs[term_offsets[t]:term_offsets[t + 1]] (ascending doc ids,
+    which are rows of the token corpus) with one BM25 weight each, so scoring a query only
+    touches the postings of its terms.
+    """
+
+    def __init__(self, vocab_index: dict[str, int], term_offsets: np.ndarray, docs: np.ndarray, weights: np.ndarray,
+                 sentiment_codes: np.ndarray, has_text: np.ndarray):
+        self.vocab_index = vocab_index
+        self.term_offsets = term_offsets
+        self.docs = docs
+        self.weights = weights
+        self.sentiment_codes = sentiment_codes # index into SENTIMENTS, -1 when not analyzed
+        self.has_text = has_text
+
+    def __len__(self) -> int:
+        return len(self.has_text)
+
+    def __deepcopy__(self, memo):
+        return self # immutable, pandas deep-copies attrs on every slice
+
+    def nbytes(self) -> int:
+        arrays = (self.term_offsets, self.docs, self.weights, self.sentiment_codes, self.has_text)
+        return sum(array.nbytes for array in arrays) + sum(len(token) for token in self.vocab_index)
+
+    @cached_property
+    def sorted_vocab(self) -> list[str]:
+        """Indexed lemmas in lexical order, for prefix lookups of the model-free query tokenizer."""
+        return sorted(self.vocab_index)
+
+    def sentiment_mask(self, sentiments) -> np.ndarray:
+        """Bitmask of the documents with one of the given sentiment labels."""
+        codes = [SENTIMENTS.index(label) for label in sentiments if label in SENTIMENTS]
+        return np.isin(self.sentiment_codes, codes)
+
+    def score(self, query_tokens: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Documents containing any query token, as (doc ids, distinct query terms matched, BM25 scores)."""
+        terms = Counter(self.vocab_index[token] for token in query_tokens if token in self.vocab_index)
+        if not terms:
+            return np.array([], dtype=np.int32), np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        docs = np.concatenate([self.docs[self.term_offsets[t]:self.term_offsets[t + 1]] for t in terms])
+        weights = np.concatenate([self.weights[self.term_offsets[t]:self.term_offsets[t + 1]] * query_count
+                                  for t, query_count in terms.items()])
+        matched, inverse = np.unique(docs, return_inverse=True)
+        # a doc is in the postings of a term once, so its postings count is the number of terms it matches
+        return (matched, np.bincount(inverse, minlength=len(matched)),
+                np.bincount(inverse, weights=weights, minlength=len(matched)))
+
+
+def build_search_index(df: pd.DataFrame) -> SearchIndex:
+    """Index the tokens of df's rows; doc ids are positions in the token corpus of df."""
+    logger.info("Building search index...")
+    corpus = get_token_corpus(df)
+    n_docs = len(corpus)
+    lengths = corpus.lengths
+    rows = np.repeat(np.arange(n_docs, dtype=np.int64), lengths)
+
+    # one posting per (term, doc) with its term frequency, sorted by term then doc
+    pair_keys, tf = np.unique(corpus.ids.astype(np.int64) * max(n_docs, 1) + rows, return_counts=True)
+    terms, docs = np.divmod(pair_keys, max(n_docs, 1))
+    doc_freq = np.bincount(terms, minlength=len(corpus.vocab))
+    term_offsets = np.zeros(len(corpus.vocab) + 1, dtype=np.int64)
+    np.cumsum(doc_freq, out=term_offsets[1:])
+
+    idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+    avg_length = lengths.mean() if n_docs and lengths.any() else 1.0
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[docs] / avg_length)
+    weights = (idf[terms] * tf * (BM25_K1 + 1) / (tf + norm)).astype(np.float32)
+
+    sentiment_codes = pd.Categorical(df['sentiment_label'], categories=SENTIMENTS).codes.astype(np.int8)
+    index = SearchIndex(corpus.vocab_index, term_offsets, docs.astype(np.int32), weights,
+                        sentiment_codes, df['review_text'].notnull().to_numpy())
+    logger.info(f"Search index holds {len(docs)} postings over {len(corpus.vocab)} lemmas.")
+    return index
+
+
+def get_search_index(df: pd.DataFrame) -> tuple[SearchIndex, np.ndarray]:
+    """Search index covering df and the doc id of each of df's rows.
+
+    Uses the index in df.attrs when df is a slice of the indexed frame, otherwise indexes df itself.
+    """
+    index = df.attrs.get(SEARCH_INDEX_ATTR)
+    if index is not None and TOKEN_ROW in df.columns:
+        doc_ids = df[TOKEN_ROW].to_numpy()
+        if not len(doc_ids) or doc_ids.max() < len(index):
+            return index, doc_ids
+        # attrs of another frame, e.g. kept by a merge
+        logger.warning('Search index in attrs does not cover the frame, indexing it again')
+    return build_search_index(df), np.arange(len(df))
+
+
+def _threshold_keep(values: np.ndarray, k: int) -> np.ndarray:
+    """Mask of the k smallest values plus everything tied with the k-th, so a stable sort of the rest is exact."""
+    if k >= len(values):
+        return np.ones(len(values), dtype=bool)
+    return values <= np.partition(values, k - 1)[k - 1]
+
+
+def top_rows(scores: np.ndarray, sort_keys: np.ndarray, k: int, relevance: np.ndarray | None = None) -> np.ndarray:
+    """Positions of the k best rows: highest score first, then smallest sort key, then highest relevance, then position."""
+    if k <= 0 or not len(scores):
+        return np.array([], dtype=np.int64)
+    kept = np.flatnonzero(_threshold_keep(-scores, k))
+    if np.all(scores[kept] == scores[kept[0]]):
+        # one score level left (e.g. no query), so the sort key alone decides
+        kept = kept[_threshold_keep(sort_keys[kept], k)]
+    tie_breaks = (kept,) if relevance is None else (kept, -relevance[kept])
+    order = np.lexsort((*tie_breaks, sort_keys[kept], -scores[kept]))
+    return kept[order[:k]]
@@ -0,0 +1,84 @@
+# src/common/artifacts.py
+
+import datetime as dt
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import streamlit as st
+
+from src.common.cache import get_filtered_data, get_range_kpis, get_sentiment_ngrams, get_timeframe_data
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+SELECTION_KEY = 'selection'
+ARTIFACTS_KEY = 'artifacts'
+
+
+@dataclass(frozen=True)
+class Selection:
+    """Sidebar state every page artifact is derived from."""
+    place_ids: tuple
+    start_date: dt.date
+    end_date: dt.date
+    freq: str
+
+
+# name -> (producer, names of the Selection fields it depends on)
+_registry: dict[str, tuple[Callable[[Selection], Any], tuple[str, ...]]] = {}
+
+
+def artifact(name: str, inputs: tuple[str, ...] = ('place_ids', 'start_date', 'end_date')):
+    """Register a function computing a page artifact from the parts of the selection it reads."""
+    def register(producer: Callable[[Selection], Any]):
+        _registry[name] = (producer, inputs)
+        return producer
+    return register
+
+
+def set_selection(selection: Selection) -> None:
+    st.session_state[SELECTION_KEY] = selection
+
+
+def get_artifact(name: str) -> Any:
+    """Artifact for the current selection, computed on first access and kept until its inputs change."""
+    producer, inputs = _registry[name]
+    selection = st.session_state[SELECTION_KEY]
+    key = tuple(getattr(selection, field) for field in inputs)
+    store = st.session_state.setdefault(ARTIFACTS_KEY, {})
+    if name not in store or store[name][0] != key:
+        logger.debug(f"Computing artifact '{name}'")
+        store[name] = (key, producer(selection))
+    return store[name][1]
+
+
+def require(*names: str) -> list:
+    """Artifacts a page needs, in the given order."""
+    return [get_artifact(name) for name in names]
+
+
+@artifact('df_filtered')
+def _filtered_data(selection: Selection):
+    return get_filtered_data(selection.place_ids, selection.start_date, selection.end_date)
+
+
+@artifact('df_display', inputs=('place_ids', 'start_date', 'end_date', 'freq'))
+def _timeframe_data(selection: Selection):
+    return get_timeframe_data(selection.place_ids, selection.start_date, selection.end_date, selection.freq)
+
+
+@artifact('kpis', inputs=('place_ids', 'start_date', 'end_date', 'freq'))
+def _kpis(selection: Selection):
+    return get_range_kpis(selection.place_ids, selection.start_date, selection.end_date, selection.freq)
+
+
+# The word cloud shows at most 50 n-grams and the bar chart 20
+@artifact('positive_ngrams_dists')
+def _positive_ngrams(selection: Selection):
+    return get_sentiment_ngrams(get_artifact('df_filtered'), 'Positive', selection.place_ids,
+                                selection.start_date, selection.end_date, top_k=50)
+
+
+@artifact('negative_ngrams_dists')
+def _negative_ngrams(selection: Selection):
+    return get_sentiment_ngrams(get_artifact('df_filtered'), 'Negative', selection.place_ids,
+                                selection.start_date, selection.end_date, top_k=50)
@@ -1,39 +1,161 @@
 # src/common/cache.py
 
+import datetime as dt
 import streamlit as st
 import pandas as pd
 from pathlib import Path
 
-from src.data_loader import load_enriched_data
+from src.config import DATA_FILE_PATH, ENRICHED_DATASET_PATH, SERVING_MODE, USE_ENRICHED_DATASET
+from src.data_loader import load_enriched_data, write_enriched_csv
+from src.enriched_dataset import read_dataset_places, read_enriched_dataset
+from src.place_time_index import PLACE_TIME_INDEX_ATTR
+from src.common.selection_cache import dataset_version, selection_cache
 from src.utils.logger import get_logger
-from src.analytics.aggregations import aggregate_by_timeframe, ngram_distribution
+from src.analytics.aggregations import aggregate_rollup, build_daily_rollup, ngram_distribution, select_rollup
+from src.analytics.ngram_cube import NGRAM_CUBE_ATTR
+from src.analytics.kpi_index import KpiIndex, range_kpis
 
 logger = get_logger(__name__)
 
-# File path
-PROJECT_ROOT = Path(__file__).resolve().parents[2] # resolve() - get absolute path, parent[2] - go up two levels to 'src'
-DATA_FILE_PATH = PROJECT_ROOT / 'src' / 'data' / 'reviews.csv'
-
-@st.cache_data(show_spinner="Loading data...", show_time=True)
-def get_data(file_path: Path = DATA_FILE_PATH) -> pd.DataFrame:
-    """Load and cache enriched data from the specified file path."""
-    
+# The cached loaders take dataset_version(file_path) as an argument, so an edited file is reloaded
+@st.cache_resource(show_spinner="Loading data...", show_time=True, max_entries=1)
+def _load_data(file_path: Path, version: tuple) -> pd.DataFrame:
     df = load_enriched_data(file_path)
     logger.info(f"Data loaded to cache with {len(df)} records.")
     return df
 
-@st.cache_data(show_spinner="Aggregating data...")
-def get_aggregated_data(df: pd.DataFrame, freq: str) -> pd.DataFrame:
-    """Aggregate data by the specified timeframe frequency."""
+def get_data(file_path: Path = DATA_FILE_PATH) -> pd.DataFrame:
+    """Load and cache enriched data from the specified file path.
+
+    The frame is shared by all sessions without copying and must be treated as read-only.
+    """
+    
+    return _load_data(file_path, dataset_version(file_path))
+
+def _ensure_dataset(file_path: Path) -> None:
+    """(Re)build the enriched Parquet dataset when it is missing or older than the CSV."""
+    
+    dataset_mtime = ENRICHED_DATASET_PATH.stat().st_mtime if ENRICHED_DATASET_PATH.exists() else 0
+    if SERVING_MODE:
+        # rebuilding would run the models, the dataset is built offline in serving mode,
+        # possibly on another machine, so the CSV may not be here at all
+        if not dataset_mtime:
+            raise FileNotFoundError(f'Serving mode needs an enriched dataset at {ENRICHED_DATASET_PATH}')
+        if Path(file_path).exists() and dataset_mtime < Path(file_path).stat().st_mtime:
+            logger.warning('Enriched dataset is older than the CSV, serving it as it is')
+        return
+    if dataset_mtime < Path(file_path).stat().st_mtime:
+        write_enriched_csv(file_path, ENRICHED_DATASET_PATH)
+
+@st.cache_data(show_spinner="Loading locations...", show_time=True, max_entries=1)
+def _load_places(file_path: Path, version: tuple) -> pd.DataFrame:
+    if USE_ENRICHED_DATASET:
+        return read_dataset_places(ENRICHED_DATASET_PATH)
+    places = (get_data(file_path)
+              .groupby(['place_id', 'place_name'], sort=False, observed=True)['publish_time']
+              .agg(min_time='min', max_time='max')
+              .reset_index())
+    places.attrs = {} # not the review indexes of get_data, cache_data would pickle them with every copy
+    return places
+
+def get_places(file_path: Path = DATA_FILE_PATH) -> pd.DataFrame:
+    """Places with their publish time bounds, in order of first appearance.
+
+    Called first on every rerun, so in dataset mode it also rebuilds a stale dataset before any
+    cache key is taken from its version.
+    """
+    
+    if USE_ENRICHED_DATASET:
+        _ensure_dataset(file_path)
+    return _load_places(file_path, dataset_version(file_path))
+
+def _read_dataset_slice(place_ids: tuple, start_date: dt.date, end_date: dt.date, file_path: Path = DATA_FILE_PATH) -> pd.DataFrame:
+    return selection_cache.get_or_compute(
+        ('dataset_slice', dataset_version(file_path), place_ids, start_date, end_date),
+        lambda: read_enriched_dataset(ENRICHED_DATASET_PATH, list(place_ids), start_date, end_date))
+
+def get_filtered_data(place_ids: tuple, start_date: dt.date, end_date: dt.date, file_path: Path = DATA_FILE_PATH) -> pd.DataFrame:
+    """Return reviews of the given places published within the inclusive date range."""
+    
+    if USE_ENRICHED_DATASET:
+        return _read_dataset_slice(place_ids, start_date, end_date, file_path)
+    df = get_data(file_path)
+    index = df.attrs.get(PLACE_TIME_INDEX_ATTR)
+    if index is not None:
+        return index.select(df, place_ids, start_date, end_date)
+    df = df[df['place_id'].isin(place_ids)]
+    return df[
+        (df["publish_time"].dt.date >= start_date)
+        & (df["publish_time"].dt.date <= end_date)
+    ].copy()
+
+@st.cache_resource(show_spinner="Building daily rollup...", max_entries=1)
+def _build_daily_rollup(file_path: Path, version: tuple) -> pd.DataFrame:
+    return build_daily_rollup(get_data(file_path))
+
+def get_daily_rollup(file_path: Path = DATA_FILE_PATH) -> pd.DataFrame:
+    """Build the per place and day metric rollup once for the whole dataset."""
+    
+    return _build_daily_rollup(file_path, dataset_version(file_path))
+
+def get_timeframe_data(place_ids: tuple, start_date: dt.date, end_date: dt.date, freq: str, file_path: Path = DATA_FILE_PATH) -> pd.DataFrame:
+    """Aggregate the selected places and dates by the given frequency, re-bucketing the daily rollup."""
+    
+    def compute() -> pd.DataFrame:
+        if USE_ENRICHED_DATASET:
+            rollup = build_daily_rollup(_read_dataset_slice(place_ids, start_date, end_date, file_path))
+        else:
+            rollup = select_rollup(get_daily_rollup(file_path), place_ids, start_date, end_date)
+        aggregated_df = aggregate_rollup(rollup, freq)
+        logger.info(f"Aggregated data cached with frequency '{freq}' and {len(aggregated_df)} records.")
+        return aggregated_df
+
+    return selection_cache.get_or_compute(
+        ('timeframe', dataset_version(file_path), place_ids, start_date, end_date, freq), compute)
+
+@st.cache_resource(show_spinner="Indexing KPIs...", max_entries=1)
+def _build_kpi_index(file_path: Path, version: tuple) -> KpiIndex:
+    return KpiIndex.from_rollup(get_daily_rollup(file_path))
+
+def get_kpi_index(file_path: Path = DATA_FILE_PATH) -> KpiIndex:
+    """Prefix-sum KPI index over the whole dataset, shared by all sessions."""
     
-    aggregated_df = aggregate_by_timeframe(df, freq)
-    logger.info(f"Aggregated data cached with frequency '{freq}' and {len(aggregated_df)} records.")
-    return aggregated_df
+    return _build_kpi_index(file_path, dataset_version(file_path))
+
+def get_range_kpis(place_ids: tuple, start_date: dt.date, end_date: dt.date, freq: str, file_path: Path = DATA_FILE_PATH) -> dict | None:
+    """KPI card values of the selected places and dates with their previous-period values."""
+    
+    def compute() -> dict | None:
+        if USE_ENRICHED_DATASET:
+            index = KpiIndex.from_rollup(build_daily_rollup(_read_dataset_slice(place_ids, start_date, end_date, file_path)))
+        else:
+            index = get_kpi_index(file_path)
+        return range_kpis(index, place_ids, start_date, end_date, freq)
+
+    return selection_cache.get_or_compute(
+        ('kpis', dataset_version(file_path), place_ids, start_date, end_date, freq), compute)
+
+def get_sentiment_ngrams(df_filtered: pd.DataFrame, sentiment: str, place_ids: tuple, start_date: dt.date, end_date: dt.date,
+                         top_k: int | None = None, file_path: Path = DATA_FILE_PATH) -> dict:
+    """N-gram distributions of the selected reviews with the given sentiment.
+
+    Merged from the pre-aggregated n-gram cube when the data carries one, otherwise counted from the tokens.
+    df_filtered must be the selection described by place_ids, start_date and end_date, which key the cache.
+    """
+    
+    def compute() -> dict:
+        df_sentiment = df_filtered[df_filtered['sentiment_label'] == sentiment]
+        cube = df_filtered.attrs.get(NGRAM_CUBE_ATTR)
+        if cube is not None:
+            return cube.ngram_distribution(df_sentiment, sentiment, place_ids, start_date, end_date, top_k=top_k)
+        ngram_dists = ngram_distribution(df_sentiment, top_k=top_k)
+        logger.info("N-gram distributions cached.")
+        return ngram_dists
+
+    return selection_cache.get_or_compute(
+        ('ngrams', dataset_version(file_path), place_ids, start_date, end_date, sentiment, top_k), compute)
 
-@st.cache_data(show_spinner="Loading n-gram distributions...")
-def get_ngram_distributions(df: pd.DataFrame) -> dict:
-    """Calculate and cache n-gram distributions from the tokenized texts."""
+def get_cache_stats() -> dict:
+    """Entries, size and hit/miss counters of the selection cache."""
     
-    ngram_dists = ngram_distribution(df)
-    logger.info("N-gram distributions cached.")
-    return ngram_dists
\ No newline at end of file
+    return selection_cache.stats()
@@ -0,0 +1,98 @@
+# src/common/selection_cache.py
+
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from src.config import ENRICHED_DATASET_PATH, SELECTION_CACHE_MAX_BYTES, USE_ENRICHED_DATASET
+from src.enriched_dataset import dataset_signature
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+
+def dataset_version(file_path: Path) -> tuple:
+    """Cheap signature of the data a selection is computed from.
+
+    With the enriched dataset that is the dataset version, so the CSV need not exist where the
+    dashboard is served.
+    """
+    if USE_ENRICHED_DATASET:
+        return ('dataset', *dataset_signature(ENRICHED_DATASET_PATH))
+    stat = Path(file_path).stat()
+    return (str(file_path), stat.st_mtime_ns, stat.st_size)
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory held by a cached value, in bytes."""
+    if isinstance(value, pd.DataFrame):
+        # attrs hold derived indexes (token corpus, search index, ...) as large as the columns
+        return int(value.memory_usage(index=True, deep=True).sum()) + sum(estimate_size(v) for v in value.attrs.values())
+    if callable(getattr(value, 'nbytes', None)):
+        return value.nbytes()
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class SelectionCache:
+    """Process-wide LRU cache of per-selection results, bounded by their estimated size.
+
+    Keys are small tuples describing the selection (dataset version, places, dates, ...), so
+    a lookup never hashes a DataFrame. Values are shared between sessions, callers must not
+    mutate them.
+    """
+
+    def __init__(self, max_bytes: int = SELECTION_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[tuple, tuple[Any, int]] = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key][0]
+            self.misses += 1
+
+        value = compute()
+        size = estimate_size(value)
+        with self._lock:
+            if key in self.entries: # computed concurrently by another session
+                return self.entries[key][0]
+            if size > self.max_bytes:
+                logger.warning(f'Result of {key[0]} ({size:,} bytes) exceeds the selection cache, not cached')
+                return value
+            self.entries[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.nbytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self.entries), 'bytes': self.nbytes, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+
+selection_cache = SelectionCache()
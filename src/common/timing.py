@@ -0,0 +1,37 @@
+# src/common/timing.py
+
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+TIMINGS_KEY = 'timings'
+TIMINGS_KEPT = 50 # latest durations kept per unit and session
+
+
+@contextmanager
+def timed(name: str):
+    """Log how long a rerun unit (full script or fragment) took and keep it in the session."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.debug(f'{name} took {elapsed_ms:.1f} ms')
+        timings = st.session_state.setdefault(TIMINGS_KEY, {})
+        timings.setdefault(name, deque(maxlen=TIMINGS_KEPT)).append(elapsed_ms)
+
+
+def timing_summary() -> pd.DataFrame:
+    """Runs, median and last duration per rerun unit of this session, in milliseconds."""
+    timings = st.session_state.get(TIMINGS_KEY, {})
+    return pd.DataFrame(
+        [{'unit': name, 'runs': len(values), 'median_ms': pd.Series(values).median(), 'last_ms': values[-1]}
+         for name, values in timings.items()],
+        columns=['unit', 'runs', 'median_ms', 'last_ms'],
+    )
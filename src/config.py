@@ -0,0 +1,65 @@
+# src/config.py
+
+import os
+from pathlib import Path
+
+# --- PATHS ---
+PROJECT_ROOT = Path(__file__).resolve().parents[1] # resolve() - get absolute path, parents[1] - go up to project root
+DATA_DIR = PROJECT_ROOT / 'src' / 'data'
+DATA_FILE_PATH = DATA_DIR / 'reviews.csv'
+
+# On-disk store of already enriched reviews (sentiment + tokens), see src/enrichment_store.py
+ENRICHMENT_STORE_PATH = Path(os.getenv('SENTIENCE_STORE_PATH', DATA_DIR / 'enriched_store'))
+
+# Parquet dataset of enriched reviews partitioned by place and month, see src/enriched_dataset.py
+ENRICHED_DATASET_PATH = Path(os.getenv('SENTIENCE_DATASET_PATH', DATA_DIR / 'enriched_dataset'))
+# When enabled the dashboard reads only the selected places and dates from the dataset
+USE_ENRICHED_DATASET = os.getenv('SENTIENCE_USE_DATASET', '0') == '1'
+
+# Serving mode only reads already enriched reviews and never imports torch, transformers or spaCy.
+# Reviews missing from the enrichment store are shown without sentiment and tokens until enriched offline.
+SERVING_MODE = os.getenv('SENTIENCE_SERVING_MODE', '0') == '1'
+
+# Rows per chunk for streaming CSV ingestion, 0 reads the whole file at once
+CSV_CHUNK_SIZE = int(os.getenv('SENTIENCE_CSV_CHUNK_SIZE', 0))
+
+# --- MODELS ---
+SENTIMENT_MODEL = os.getenv('SENTIENCE_SENTIMENT_MODEL', 'quikli/sentience-sentiment_analysis')
+# 'torch' (fp32), 'torch-int8' (dynamic quantization) or 'onnx' (onnxruntime), falls back to 'torch'
+SENTIMENT_BACKEND = os.getenv('SENTIENCE_SENTIMENT_BACKEND', 'torch')
+SENTIMENT_ONNX_PATH = Path(os.getenv('SENTIENCE_SENTIMENT_ONNX_PATH', DATA_DIR / 'models' / 'sentiment.onnx'))
+SPACY_MODEL = os.getenv('SENTIENCE_SPACY_MODEL', 'pl_core_news_md')
+EMBEDDING_MODEL = os.getenv('SENTIENCE_EMBEDDING_MODEL', 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
+
+# --- TOKENIZATION ---
+TOKENIZE_BATCH_SIZE = int(os.getenv('SENTIENCE_TOKENIZE_BATCH_SIZE', 256))
+TOKENIZE_N_PROCESS = int(os.getenv('SENTIENCE_TOKENIZE_N_PROCESS', 1)) # -1 uses all available cores
+
+# --- SENTIMENT INFERENCE ---
+SENTIMENT_BATCH_SIZE = int(os.getenv('SENTIENCE_SENTIMENT_BATCH_SIZE', 32))
+SENTIMENT_MAX_LENGTH = int(os.getenv('SENTIENCE_SENTIMENT_MAX_LENGTH', 512)) # longer reviews are truncated
+SENTIMENT_NUM_THREADS = int(os.getenv('SENTIENCE_SENTIMENT_NUM_THREADS', 0)) # torch intra-op threads, 0 keeps torch default
+SENTIMENT_WORKERS = int(os.getenv('SENTIENCE_SENTIMENT_WORKERS', 1)) # >1 shards inference across a pool of worker processes
+
+# --- OFFLINE ENRICHMENT (python -m src.enrich) ---
+ENRICH_CHECKPOINT_ROWS = int(os.getenv('SENTIENCE_ENRICH_CHECKPOINT_ROWS', 10_000)) # reviews enriched between store writes
+ENRICH_CHUNK_SIZE = int(os.getenv('SENTIENCE_ENRICH_CHUNK_SIZE', 50_000)) # CSV rows read at once
+
+# --- SEMANTIC SEARCH ---
+# When enabled, review embeddings are computed at enrichment time (needs sentence-transformers), see src/embeddings.py
+SEMANTIC_SEARCH = os.getenv('SENTIENCE_SEMANTIC_SEARCH', '0') == '1'
+EMBEDDINGS_PATH = Path(os.getenv('SENTIENCE_EMBEDDINGS_PATH', DATA_DIR / 'embeddings'))
+EMBEDDING_BATCH_SIZE = int(os.getenv('SENTIENCE_EMBEDDING_BATCH_SIZE', 64))
+SEMANTIC_BLOCK_ROWS = int(os.getenv('SENTIENCE_SEMANTIC_BLOCK_ROWS', 1 << 16)) # embedding rows scored per block
+SEMANTIC_MAX_RESULTS = int(os.getenv('SENTIENCE_SEMANTIC_MAX_RESULTS', 200)) # nearest reviews returned per query
+
+# --- DASHBOARD ---
+SELECTION_CACHE_MAX_BYTES = int(os.getenv('SENTIENCE_CACHE_MAX_BYTES', 256 * 1024 ** 2)) # per-selection results kept in memory
+EVIDENCE_PAGE_SIZE = int(os.getenv('SENTIENCE_EVIDENCE_PAGE_SIZE', 50)) # Evidence Explorer rows per page
+CHART_MAX_PERIODS = int(os.getenv('SENTIENCE_CHART_MAX_PERIODS', 1000)) # consecutive periods are merged above this many per chart
+CHART_WIDTH_PX = int(os.getenv('SENTIENCE_CHART_WIDTH_PX', 700)) # assumed width of a half-page chart, Streamlit does not report it
+TREND_DOWNSAMPLE = os.getenv('SENTIENCE_TREND_DOWNSAMPLE', 'lttb') # 'lttb', 'minmax' or 'none'
+TREND_POINTS_PER_PX = float(os.getenv('SENTIENCE_TREND_POINTS_PER_PX', 0.5)) # trend point budget per pixel of width
+WORDCLOUD_SCALE = float(os.getenv('SENTIENCE_WORDCLOUD_SCALE', 2)) # 800x400 word clouds are rendered at this scale
+WORDCLOUD_CACHE_SIZE = int(os.getenv('SENTIENCE_WORDCLOUD_CACHE_SIZE', 32)) # rendered PNGs kept in memory
+SHOW_TIMINGS = os.getenv('SENTIENCE_SHOW_TIMINGS', '0') == '1' # rerun durations in the sidebar
@@ -1,11 +1,29 @@
+import numpy as np
 import pandas as pd
+from pathlib import Path
+from typing import Iterator
 
-from src.preprocess import format_data, clean_data, tokenize_texts
+from src.config import (CSV_CHUNK_SIZE, ENRICHED_DATASET_PATH, ENRICHMENT_STORE_PATH, ENRICH_CHUNK_SIZE, SEMANTIC_SEARCH, SERVING_MODE, SENTIMENT_BATCH_SIZE,
+                        SENTIMENT_WORKERS, TOKENIZE_BATCH_SIZE, TOKENIZE_N_PROCESS)
+from src.embeddings import update_embeddings
+from src.enriched_dataset import EnrichedDatasetWriter, read_dataset_columns
+from src.analytics.ngram_cube import NGRAM_CUBE_ATTR, build_ngram_cube
+from src.analytics.search_index import SEARCH_INDEX_ATTR, build_search_index
+from src.place_time_index import PLACE_TIME_INDEX_ATTR, PlaceTimeIndex, sort_by_place_time
+from src.nlp.tokens import CORPUS_ATTR, encode_token_column
+from src.enrichment_store import append_store, content_hashes, load_store, split_cached, store_fingerprint
+from src.preprocess import format_data, clean_data, tokenize_texts, compact_data, memory_report
 from src.sentiment_analysis import analyze_sentiments
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Declared schema of the raw reviews CSV. Everything is read as text, format_data coerces
+# rating and the dates so a malformed cell becomes missing instead of failing the read.
+RAW_COLUMNS = ['review_id', 'place_id', 'place_name', 'author_name', 'rating', 'review_text',
+               'publish_time', 'reply_text', 'reply_publish_time']
+RAW_DTYPES = {col: 'str' for col in RAW_COLUMNS}
+
 
 def load_data(file_path: str) -> pd.DataFrame:
     """Load data from a CSV file into a pandas DataFrame."""
@@ -20,16 +38,176 @@ def load_data(file_path: str) -> pd.DataFrame:
         return pd.DataFrame()
 
 
-def load_enriched_data(file_path: str) -> pd.DataFrame:
-    """Load enriched data"""
+def _iter_arrow_chunks(file_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Stream the CSV with pyarrow, re-slicing its record batches into chunks of chunksize rows."""
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    column_types = {col: pa.string() for col in RAW_DTYPES}
+    reader = pa_csv.open_csv(
+        file_path,
+        convert_options=pa_csv.ConvertOptions(column_types=column_types, strings_can_be_null=True),
+    )
+
+    pending, n_pending = [], 0
+    for batch in reader:
+        pending.append(batch)
+        n_pending += batch.num_rows
+        while n_pending >= chunksize:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunksize).to_pandas()
+            pending = table.slice(chunksize).to_batches()
+            n_pending -= chunksize
+    if n_pending:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+
+def iter_data_chunks(file_path: str, chunksize: int = CSV_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Read a CSV in chunks of chunksize rows with every declared column as text."""
+    logger.info(f'Streaming raw data from: {file_path} in chunks of {chunksize} rows...')
+    try:
+        import pyarrow.csv # noqa: F401
+    except ImportError:
+        logger.debug('pyarrow not available, using pandas chunked reader')
+        yield from pd.read_csv(file_path, dtype=RAW_DTYPES, chunksize=chunksize)
+    else:
+        yield from _iter_arrow_chunks(str(file_path), chunksize)
+
+
+def enrich_texts(df: pd.DataFrame, store: pd.DataFrame | None = None, store_path: Path = ENRICHMENT_STORE_PATH) -> pd.DataFrame:
+    """Enrich cleaned reviews, running the models only on reviews missing from the store."""
+    df = df[['review_id', 'review_text']].copy()
+    # a server without the models matches on the fingerprint of the store instead of its own
+    fingerprint = store_fingerprint(store_path) if SERVING_MODE else None
+    df['content_hash'] = content_hashes(df['review_text'], fingerprint)
+
+    if store is None:
+        store = load_store(store_path)
+    cached, missing = split_cached(df, store)
+    if SERVING_MODE:
+        if not missing.empty:
+            logger.warning(f'Serving mode: {len(missing)} reviews are not in the enrichment store and are shown without sentiment and tokens')
+        return cached.drop(columns='content_hash')
+    logger.info(f'{len(cached)} reviews read from enrichment store, {len(missing)} sent for inference')
+
+    if not missing.empty:
+        fresh = enrich_missing(missing, store_path)
+        cached = fresh if cached.empty else pd.concat([cached, fresh], ignore_index=True)
+
+    return cached.drop(columns='content_hash')
+
+
+def enrich_missing(missing: pd.DataFrame, store_path: Path = ENRICHMENT_STORE_PATH,
+                   sentiment_workers: int = SENTIMENT_WORKERS, sentiment_batch_size: int = SENTIMENT_BATCH_SIZE,
+                   tokenize_batch_size: int = TOKENIZE_BATCH_SIZE, tokenize_n_process: int = TOKENIZE_N_PROCESS,
+                   pool=None) -> pd.DataFrame:
+    """Run the models on hashed reviews and append the result to the store as one part."""
+    df_analyzed = analyze_sentiments(missing, n_workers=sentiment_workers, batch_size=sentiment_batch_size, pool=pool)
+    df_nlp = tokenize_texts(missing, batch_size=tokenize_batch_size, n_process=tokenize_n_process)
+    fresh = (missing[['review_id', 'content_hash']]
+             .merge(df_nlp, on='review_id', how='left')
+             .merge(df_analyzed, on='review_id', how='left'))
+    append_store(fresh, store_path)
+    return fresh
+
+
+def _enrich_chunk(df: pd.DataFrame, store: pd.DataFrame | None = None, store_path: Path = ENRICHMENT_STORE_PATH) -> pd.DataFrame:
+    df = format_data(df)
+    df_enriched = enrich_texts(clean_data(df), store=store, store_path=store_path)
+    return pd.merge(df, df_enriched, on='review_id', how='left')
+
+
+def load_enriched_data(file_path: str, chunksize: int = CSV_CHUNK_SIZE, store_path: Path = ENRICHMENT_STORE_PATH) -> pd.DataFrame:
+    """Load enriched data into memory, streaming the CSV chunk by chunk when chunksize is set."""
     logger.info(f'Loading enriched data from: {file_path}...')
-    df = load_data(file_path)
+    if chunksize:
+        df = _load_enriched_chunks(file_path, chunksize, store_path)
+    else:
+        df = load_data(file_path)
+        if not df.empty:
+            df = _enrich_chunk(df, store_path=store_path)
     if df.empty:
         logger.warning('Data is empty')
         return df
-    df = format_data(df)
-    df_analyzed = analyze_sentiments(clean_data(df))
-    df_nlp = tokenize_texts(clean_data(df))
-    df = pd.merge(df, df_nlp, on='review_id', how='left')
 
-    return pd.merge(df, df_analyzed, on='review_id', how='left')
+    df_compact = compact_data(df)
+    report = memory_report(df, df_compact)
+    logger.info(f"Enriched data compacted from {report.loc['TOTAL', 'bytes_before']:,.0f} to {report.loc['TOTAL', 'bytes_after']:,.0f} bytes")
+    logger.debug(f'Memory per column:\n{report.to_string()}')
+    df = df_compact
+
+    if SEMANTIC_SEARCH and not SERVING_MODE:
+        _update_embeddings(df)
+    # sorted before encoding so the token corpus and the indexes below follow the same row order
+    df = sort_by_place_time(df)
+    df = encode_token_column(df)
+    corpus = df.attrs[CORPUS_ATTR]
+    logger.info(f'Tokens encoded: {len(corpus.ids)} tokens over {len(corpus.vocab)} lemmas in {corpus.nbytes():,} bytes')
+    df.attrs[NGRAM_CUBE_ATTR] = build_ngram_cube(df)
+    df.attrs[SEARCH_INDEX_ATTR] = build_search_index(df)
+    df.attrs[PLACE_TIME_INDEX_ATTR] = PlaceTimeIndex.from_frame(df)
+    return df
+
+
+def _update_embeddings(df: pd.DataFrame) -> None:
+    try:
+        update_embeddings(df)
+    except ImportError:
+        logger.warning('sentence-transformers is not installed, semantic search is unavailable')
+
+
+class ChunkDeduplicator:
+    """Drop rows repeated from earlier chunks, remembering a 64-bit hash of every row seen."""
+
+    def __init__(self):
+        self.seen = np.array([], dtype=np.uint64)
+
+    def __call__(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        keep = np.zeros(len(chunk), dtype=bool)
+        keep[np.unique(hashes, return_index=True)[1]] = True
+        keep &= ~np.isin(hashes, self.seen)
+        self.seen = np.union1d(self.seen, hashes)
+        if not keep.all():
+            logger.debug(f'Dropped {len(chunk) - keep.sum()} duplicate rows')
+        return chunk[keep]
+
+
+def _load_enriched_chunks(file_path: str, chunksize: int, store_path: Path = ENRICHMENT_STORE_PATH) -> pd.DataFrame:
+    """Format, clean and enrich every chunk before reading the next one.
+
+    The enriched chunks are all kept for the in-memory frame, write_enriched_csv is the bounded-memory path.
+    """
+    store = load_store(store_path)
+    deduplicate = ChunkDeduplicator()
+    parts = []
+    for chunk in iter_data_chunks(file_path, chunksize):
+        parts.append(_enrich_chunk(deduplicate(chunk), store=store, store_path=store_path))
+        logger.info(f'Chunk {len(parts)} enriched ({sum(len(part) for part in parts)} records so far)')
+    if not parts:
+        return pd.DataFrame()
+
+    return pd.concat(parts, ignore_index=True)
+
+
+def write_enriched_csv(file_path: str, dataset_path: Path = ENRICHED_DATASET_PATH, chunksize: int = ENRICH_CHUNK_SIZE,
+                       store_path: Path = ENRICHMENT_STORE_PATH) -> int:
+    """Enrich the CSV chunk by chunk straight into the Parquet dataset and return its number of records.
+
+    Peak memory is one chunk plus the enrichment store, no frame of the whole file is built.
+    """
+    logger.info(f'Writing enriched dataset from: {file_path} in chunks of {chunksize} rows...')
+    store = load_store(store_path)
+    deduplicate = ChunkDeduplicator()
+    with EnrichedDatasetWriter(dataset_path) as writer:
+        for chunk in iter_data_chunks(file_path, chunksize):
+            writer.write(_enrich_chunk(deduplicate(chunk), store=store, store_path=store_path))
+    if writer.n_rows:
+        update_dataset_embeddings(dataset_path)
+    return writer.n_rows
+
+
+def update_dataset_embeddings(dataset_path: Path = ENRICHED_DATASET_PATH) -> None:
+    """Embed the reviews of the enriched dataset missing from the embedding index."""
+    if SEMANTIC_SEARCH and not SERVING_MODE:
+        _update_embeddings(read_dataset_columns(dataset_path, ['review_id', 'review_text']))
@@ -0,0 +1,166 @@
+# src/embeddings.py
+
+import shutil
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import EMBEDDING_BATCH_SIZE, EMBEDDING_MODEL, EMBEDDINGS_PATH, SEMANTIC_BLOCK_ROWS
+from src.enrichment_store import STORE_KEY, content_hashes
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+MATRIX_FILE = 'embeddings.npy' # float16 (n_reviews, dim), L2-normalized rows
+KEYS_FILE = 'keys.pkl' # review_id and content_hash of each matrix row
+CURRENT_FILE = 'CURRENT' # name of the version directory holding the matrix and keys in use
+
+
+@lru_cache(maxsize=1)
+def load_embedding_model():
+    """Load the sentence embedding model once per process."""
+    from sentence_transformers import SentenceTransformer
+    logger.info(f'Loading embedding model: {EMBEDDING_MODEL}')
+    return SentenceTransformer(EMBEDDING_MODEL, device='cpu')
+
+
+def embed_texts(texts: list[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> np.ndarray:
+    """Normalized float16 embeddings of the texts, encoded in batches."""
+    model = load_embedding_model()
+    vectors = model.encode(list(texts), batch_size=batch_size, normalize_embeddings=True,
+                           convert_to_numpy=True, show_progress_bar=False)
+    return vectors.astype(np.float16)
+
+
+def _embedding_hashes(texts: pd.Series) -> pd.Series:
+    return content_hashes(texts, fingerprint=f'embedding={EMBEDDING_MODEL}')
+
+
+def update_embeddings(df: pd.DataFrame, path: Path = EMBEDDINGS_PATH, batch_size: int = EMBEDDING_BATCH_SIZE) -> None:
+    """Embed reviews whose text is not in the matrix yet and rewrite it with the current reviews only.
+
+    Rows of reviews that were re-embedded or are gone from df are dropped. The kept rows are
+    copied block by block into the new file, so memory stays bounded by the size of the new
+    embeddings.
+    """
+    path = Path(path)
+    reviews = df.loc[df['review_text'].notnull(), ['review_id', 'review_text']].drop_duplicates('review_id', keep='last')
+    reviews['content_hash'] = _embedding_hashes(reviews['review_text'])
+    version = _current_version(path)
+    keys = _read_keys(path / version) if version else None
+    current = pd.MultiIndex.from_frame(reviews[STORE_KEY])
+    if keys is None:
+        missing, keep = reviews, None
+    else:
+        indexed = pd.MultiIndex.from_frame(keys[STORE_KEY])
+        missing = reviews[~current.isin(indexed)]
+        keep = indexed.isin(current) & ~indexed.duplicated(keep='last')
+    n_stale = 0 if keep is None else int((~keep).sum())
+    logger.info(f'{len(reviews) - len(missing)} review embeddings up to date, {len(missing)} to compute, {n_stale} stale rows to drop')
+    if missing.empty and not n_stale:
+        return
+
+    old = np.load(path / version / MATRIX_FILE, mmap_mode='r') if keys is not None else None
+    batches = [embed_texts(missing['review_text'].iloc[start:start + batch_size * 16].tolist(), batch_size)
+               for start in range(0, len(missing), batch_size * 16)]
+    fresh = np.concatenate(batches) if batches else np.empty((0, old.shape[1]), np.float16)
+    if old is None or old.shape[1] != fresh.shape[1]:
+        # first build, or a model with another dimension: start a new matrix
+        old, keys, keep = np.empty((0, fresh.shape[1]), np.float16), None, np.zeros(0, dtype=bool)
+    kept = np.flatnonzero(keep)
+    # matrix and keys go to a new version directory, published by replacing the CURRENT pointer
+    new_version = f'v{time.time_ns()}'
+    (path / new_version).mkdir(parents=True)
+    matrix = np.lib.format.open_memmap(path / new_version / MATRIX_FILE, mode='w+', dtype=np.float16, shape=(len(kept) + len(fresh), fresh.shape[1]))
+    for start in range(0, len(kept), SEMANTIC_BLOCK_ROWS):
+        rows = kept[start:start + SEMANTIC_BLOCK_ROWS]
+        matrix[start:start + len(rows)] = old[rows]
+    matrix[len(kept):] = fresh
+    matrix.flush()
+    del matrix, old
+
+    new_keys = missing[STORE_KEY].reset_index(drop=True)
+    keys = new_keys if keys is None else pd.concat([keys[keep], new_keys], ignore_index=True)
+    keys.to_pickle(path / new_version / KEYS_FILE)
+    pointer_tmp = path / (CURRENT_FILE + '.tmp')
+    pointer_tmp.write_text(new_version)
+    pointer_tmp.replace(path / CURRENT_FILE) # the one atomic step, a crash before it keeps the previous version
+    _remove_old_versions(path, keep=new_version)
+    logger.info(f'Embedding matrix holds {len(keys)} rows at: {path / new_version}')
+
+
+def _current_version(path: Path) -> str | None:
+    pointer = Path(path) / CURRENT_FILE
+    return pointer.read_text().strip() if pointer.exists() else None
+
+
+def _remove_old_versions(path: Path, keep: str) -> None:
+    """Delete superseded and unpublished version directories; open memory maps stay readable."""
+    for child in path.iterdir():
+        if child.is_dir() and child.name.startswith('v') and child.name != keep:
+            shutil.rmtree(child, ignore_errors=True)
+
+
+def _read_keys(version_path: Path) -> pd.DataFrame | None:
+    if not (version_path / KEYS_FILE).exists() or not (version_path / MATRIX_FILE).exists():
+        return None
+    return pd.read_pickle(version_path / KEYS_FILE)
+
+
+class EmbeddingIndex:
+    """Memory-mapped review embeddings searched with blocked dot products."""
+
+    def __init__(self, matrix: np.ndarray, review_ids: pd.Series):
+        self.matrix = matrix
+        # latest row of every review id
+        self.rows = pd.Series(np.arange(len(review_ids)), index=review_ids.to_numpy()).groupby(level=0).last()
+
+    def rows_of(self, review_ids) -> np.ndarray:
+        """Matrix row of each review id, -1 when it has no embedding."""
+        return self.rows.reindex(review_ids).fillna(-1).to_numpy(dtype=np.int64)
+
+    def search(self, query: np.ndarray, rows: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Top-k cosine similarities among the given matrix rows, as (positions into rows, scores)."""
+        if k <= 0 or not len(rows):
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        query = query.astype(np.float32)
+        best_positions = np.array([], dtype=np.int64)
+        best_scores = np.array([], dtype=np.float32)
+        order = np.argsort(rows, kind='stable') # ascending rows read the mmapped file sequentially
+        for start in range(0, len(order), SEMANTIC_BLOCK_ROWS):
+            positions = order[start:start + SEMANTIC_BLOCK_ROWS]
+            scores = self.matrix[rows[positions]].astype(np.float32) @ query
+            positions = np.concatenate([best_positions, positions])
+            scores = np.concatenate([best_scores, scores])
+            if len(scores) > k:
+                keep = np.argpartition(-scores, k - 1)[:k]
+                positions, scores = positions[keep], scores[keep]
+            best_positions, best_scores = positions, scores
+        return best_positions, best_scores
+
+
+def load_embedding_index(path: Path = EMBEDDINGS_PATH) -> EmbeddingIndex | None:
+    """Open the embedding matrix read-only as a memory map, None when it was never built.
+
+    The index is cached per published version, so a rewrite by another process is picked up.
+    """
+    path = Path(path)
+    version = _current_version(path)
+    return _open_embedding_index(path, version) if version else None
+
+
+@lru_cache(maxsize=1)
+def _open_embedding_index(path: Path, version: str) -> EmbeddingIndex | None:
+    keys = _read_keys(path / version)
+    if keys is None:
+        return None
+    matrix = np.load(path / version / MATRIX_FILE, mmap_mode='r')
+    logger.info(f'Embedding index opened with {len(keys)} rows')
+    return EmbeddingIndex(matrix, keys['review_id'])
+
+
+def embed_query(text: str) -> np.ndarray:
+    """Embedding of a search query, comparable with the review embeddings."""
+    return embed_texts([text])[0]
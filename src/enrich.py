@@ -0,0 +1,135 @@
+# src/enrich.py
+"""Enrich a reviews CSV offline, so the dashboard only has to read the result.
+
+Runs format_data -> clean_data -> sentiment -> tokenization over the CSV chunk by chunk, appends
+every checkpoint to the enrichment store and writes each enriched chunk to the Parquet dataset.
+A killed run resumes where it stopped, because reviews already in the store are skipped; the
+dataset only replaces the previous one once the run completes. Serve it with
+SENTIENCE_USE_DATASET=1 and SENTIENCE_SERVING_MODE=1.
+Usage: python -m src.enrich --file reviews.csv --checkpoint-rows 10000 --sentiment-workers 4
+"""
+
+import argparse
+import contextlib
+import datetime as dt
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.config import (DATA_FILE_PATH, ENRICHED_DATASET_PATH, ENRICHMENT_STORE_PATH, ENRICH_CHECKPOINT_ROWS,
+                        ENRICH_CHUNK_SIZE, SENTIMENT_BATCH_SIZE, SENTIMENT_WORKERS, TOKENIZE_BATCH_SIZE,
+                        TOKENIZE_N_PROCESS)
+from src.data_loader import ChunkDeduplicator, enrich_missing, iter_data_chunks, update_dataset_embeddings
+from src.enriched_dataset import EnrichedDatasetWriter
+from src.enrichment_store import content_hashes, load_store, split_cached
+from src.preprocess import clean_data, format_data
+from src.sentiment_analysis import sentiment_pool
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+
+class Progress:
+    """Running counts of an enrichment run, logged after every chunk and checkpoint."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.read = 0
+        self.cached = 0
+        self.enriched = 0
+        self.chunks = 0
+        self.checkpoints = 0
+
+    def _rates(self) -> str:
+        elapsed = time.perf_counter() - self.start
+        return (f'{self.read:,} read, {self.cached:,} from store, {self.enriched:,} enriched, '
+                f'{self.enriched / elapsed:,.1f} reviews/s overall, {dt.timedelta(seconds=round(elapsed))} elapsed')
+
+    def chunk(self, n_read: int, n_cached: int) -> None:
+        self.read += n_read
+        self.cached += n_cached
+        self.chunks += 1
+        logger.info(f'Chunk {self.chunks}: {n_read:,} rows read, {n_cached:,} reviews from store | {self._rates()}')
+
+    def checkpoint(self, n_rows: int, seconds: float) -> None:
+        self.enriched += n_rows
+        self.checkpoints += 1
+        logger.info(f'Checkpoint {self.checkpoints}: {n_rows:,} reviews in {seconds:.1f}s ({n_rows / seconds:,.1f}/s) | {self._rates()}')
+
+
+def enrich_csv(file_path: Path, store_path: Path = ENRICHMENT_STORE_PATH, dataset_path: Path | None = ENRICHED_DATASET_PATH,
+               chunk_size: int = ENRICH_CHUNK_SIZE, checkpoint_rows: int = ENRICH_CHECKPOINT_ROWS,
+               sentiment_workers: int = SENTIMENT_WORKERS, sentiment_batch_size: int = SENTIMENT_BATCH_SIZE,
+               tokenize_batch_size: int = TOKENIZE_BATCH_SIZE, tokenize_n_process: int = TOKENIZE_N_PROCESS) -> Progress:
+    """Enrich the CSV in one pass over its chunks.
+
+    Reviews missing from the store are enriched in checkpoints of at most checkpoint_rows reviews,
+    each appended to the store as it finishes. Every chunk is then written to the Parquet dataset
+    at dataset_path (skipped when None), so memory holds one chunk plus the store.
+    """
+    progress = Progress()
+    store = load_store(store_path)
+    pool = sentiment_pool(sentiment_workers, sentiment_batch_size) if sentiment_workers > 1 else None
+    options = dict(store_path=store_path, sentiment_workers=sentiment_workers, sentiment_batch_size=sentiment_batch_size,
+                   tokenize_batch_size=tokenize_batch_size, tokenize_n_process=tokenize_n_process, pool=pool)
+    deduplicate = ChunkDeduplicator()
+    writer = EnrichedDatasetWriter(dataset_path) if dataset_path is not None else None
+
+    try:
+        with writer or contextlib.nullcontext():
+            for chunk in iter_data_chunks(file_path, chunk_size):
+                df = format_data(deduplicate(chunk))
+                texts = clean_data(df)[['review_id', 'review_text']].copy()
+                texts['content_hash'] = content_hashes(texts['review_text'])
+                cached, missing = split_cached(texts, store)
+                progress.chunk(len(chunk), len(cached))
+
+                parts = [cached]
+                for start in range(0, len(missing), checkpoint_rows):
+                    batch = missing.iloc[start:start + checkpoint_rows]
+                    started = time.perf_counter()
+                    parts.append(enrich_missing(batch, **options))
+                    progress.checkpoint(len(batch), time.perf_counter() - started)
+                if writer is not None:
+                    enrichment = pd.concat(parts, ignore_index=True).drop(columns='content_hash')
+                    writer.write(df.merge(enrichment, on='review_id', how='left'))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if writer is not None and writer.n_rows:
+        update_dataset_embeddings(dataset_path)
+    return progress
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f'must be a positive integer, got {value}')
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', type=Path, default=DATA_FILE_PATH, help='CSV file with reviews')
+    parser.add_argument('--store', type=Path, default=ENRICHMENT_STORE_PATH, help='enrichment store (checkpoints)')
+    parser.add_argument('--dataset', type=Path, default=ENRICHED_DATASET_PATH, help='enriched Parquet dataset, written chunk by chunk')
+    parser.add_argument('--no-dataset', action='store_true', help='only fill the enrichment store')
+    parser.add_argument('--chunk-size', type=_positive_int, default=ENRICH_CHUNK_SIZE, help='CSV rows read at once')
+    parser.add_argument('--checkpoint-rows', type=_positive_int, default=ENRICH_CHECKPOINT_ROWS, help='reviews enriched between store writes')
+    parser.add_argument('--sentiment-workers', type=_positive_int, default=SENTIMENT_WORKERS, help='sentiment worker processes')
+    parser.add_argument('--sentiment-batch-size', type=_positive_int, default=SENTIMENT_BATCH_SIZE)
+    parser.add_argument('--tokenize-batch-size', type=_positive_int, default=TOKENIZE_BATCH_SIZE)
+    parser.add_argument('--tokenize-processes', type=int, default=TOKENIZE_N_PROCESS, help='spaCy processes, -1 uses all cores')
+    args = parser.parse_args()
+
+    logger.info(f'Enriching {args.file} into {args.store}')
+    progress = enrich_csv(args.file, args.store, dataset_path=None if args.no_dataset else args.dataset,
+                          chunk_size=args.chunk_size, checkpoint_rows=args.checkpoint_rows,
+                          sentiment_workers=args.sentiment_workers, sentiment_batch_size=args.sentiment_batch_size,
+                          tokenize_batch_size=args.tokenize_batch_size, tokenize_n_process=args.tokenize_processes)
+    logger.info(f'Enrichment done: {progress.read:,} rows read, {progress.cached:,} already in store, '
+                f'{progress.enriched:,} enriched in {progress.checkpoints} checkpoints')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+# src/enriched_dataset.py
+
+import datetime as dt
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.config import ENRICHED_DATASET_PATH
+from src.analytics.search_index import SEARCH_INDEX_ATTR, build_search_index
+from src.nlp.tokens import encode_token_column
+from src.preprocess import CATEGORY_CANDIDATES, MAX_CATEGORY_RATIO, compact_data
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+PARTITION_COLS = ['place_id', 'publish_month']
+ROW_GROUP_SIZE = 50_000
+COMPACT_FILE = '_compact.json' # dtypes decided on the whole dataset, pyarrow skips files starting with _
+
+
+def _start_of_day(date: dt.date) -> pd.Timestamp:
+    return pd.Timestamp(date, tz='UTC')
+
+
+# Column types fixed for every part of the dataset, so chunks written separately share one schema
+ARROW_TYPES = {
+    'rating': 'float64',
+    'publish_time': 'timestamp',
+    'reply_publish_time': 'timestamp',
+    'clean_tokens': 'tokens',
+    'sentiment_score': 'float64',
+    'weighted_sentiment': 'float64',
+    'Positive': 'int8',
+    'Neutral': 'int8',
+    'Negative': 'int8',
+}
+
+
+def _arrow_type(kind: str):
+    import pyarrow as pa
+    return {'float64': pa.float64(), 'int8': pa.int8(), 'timestamp': pa.timestamp('us', tz='UTC'),
+            'tokens': pa.list_(pa.string())}[kind]
+
+
+class EnrichedDatasetWriter:
+    """Write enriched chunks into a Parquet dataset partitioned by place_id and publish month.
+
+    Parts go to a new version directory next to path, which is a symlink to the version in use.
+    close() repoints the symlink in one atomic rename, so readers never see a half-written or
+    missing dataset, and memory holds one chunk at a time.
+    """
+
+    def __init__(self, path: Path = ENRICHED_DATASET_PATH):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(f'{self.path.name}.v{time.time_ns()}')
+        self.schema = None
+        self.n_rows = 0
+        self.n_chunks = 0
+        self._remove_versions(keep=self.path.resolve() if self.path.is_symlink() else None)
+
+    def _remove_versions(self, keep: Path | None) -> None:
+        """Delete version directories other than keep, left over by earlier or failed runs."""
+        for version in self.path.parent.glob(f'{self.path.name}.v*'):
+            if version.is_dir() and version != keep:
+                shutil.rmtree(version, ignore_errors=True)
+
+    def _table(self, df: pd.DataFrame):
+        import pyarrow as pa
+
+        df = df.sort_values(['place_id', 'publish_time']).copy() # sorted rows give tight row-group statistics for date filters
+        df['publish_month'] = df['publish_time'].dt.strftime('%Y-%m')
+        if 'clean_tokens' in df.columns:
+            df['clean_tokens'] = df['clean_tokens'].map(lambda x: list(x) if isinstance(x, tuple) else x)
+        for col in ['Positive', 'Neutral', 'Negative']:
+            if col in df.columns:
+                df[col] = df[col].fillna(0)
+        if self.schema is None:
+            fields = []
+            for field in pa.Schema.from_pandas(df, preserve_index=False):
+                if field.name in ARROW_TYPES:
+                    field = field.with_type(_arrow_type(ARROW_TYPES[field.name]))
+                elif pa.types.is_dictionary(field.type):
+                    field = field.with_type(field.type.value_type)
+                elif pa.types.is_null(field.type) or pa.types.is_large_string(field.type):
+                    field = field.with_type(pa.string())
+                fields.append(field)
+            self.schema = pa.schema(fields)
+        return pa.Table.from_pandas(df[self.schema.names], schema=self.schema, preserve_index=False)
+
+    def write(self, df: pd.DataFrame) -> None:
+        import pyarrow.parquet as pq
+
+        if df.empty:
+            return
+        pq.write_to_dataset(
+            self._table(df),
+            root_path=self.tmp_path,
+            partition_cols=PARTITION_COLS,
+            row_group_size=ROW_GROUP_SIZE,
+            basename_template=f'chunk-{self.n_chunks}-{{i}}.parquet',
+        )
+        self.n_rows += len(df)
+        self.n_chunks += 1
+        logger.info(f'Wrote chunk {self.n_chunks} to enriched dataset ({self.n_rows} records so far)')
+
+    def close(self) -> None:
+        """Replace the dataset by the chunks written so far."""
+        if not self.n_rows:
+            logger.warning('No records were written, the previous enriched dataset is kept')
+            self.abort()
+            return
+        self._write_compact_schema()
+        if self.path.exists() and not self.path.is_symlink():
+            # a dataset written before versioning: it becomes a version so the symlink can take its name
+            self.path.rename(self.path.with_name(f'{self.path.name}.v0'))
+        link = self.path.with_name(self.path.name + '.link')
+        link.unlink(missing_ok=True)
+        link.symlink_to(self.tmp_path.name, target_is_directory=True)
+        os.replace(link, self.path)
+        self._remove_versions(keep=self.tmp_path)
+        logger.info(f'Enriched dataset written with {self.n_rows} records to: {self.path}')
+
+    def _write_compact_schema(self) -> None:
+        """Decide once, on the whole dataset, which columns every slice reads back as categoricals."""
+        import pyarrow.compute as pc
+
+        dataset = _dataset(self.tmp_path)
+        categories = [col for col in CATEGORY_CANDIDATES if col in dataset.schema.names
+                      and pc.count_distinct(dataset.to_table(columns=[col])[col]).as_py() <= MAX_CATEGORY_RATIO * self.n_rows]
+        (self.tmp_path / COMPACT_FILE).write_text(json.dumps({'categories': categories}))
+
+    def abort(self) -> None:
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+    def __enter__(self) -> 'EnrichedDatasetWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            logger.error('Writing enriched dataset failed, the previous dataset is kept')
+            self.abort()
+
+
+def write_enriched_dataset(df: pd.DataFrame, path: Path = ENRICHED_DATASET_PATH) -> None:
+    """Write enriched data as Parquet partitioned by place_id and publish month."""
+    logger.info(f'Writing enriched dataset with {len(df)} records to: {path}...')
+    with EnrichedDatasetWriter(path) as writer:
+        writer.write(df)
+
+
+def _dataset(path: Path):
+    import pyarrow.dataset as ds
+    return ds.dataset(str(path), format='parquet', partitioning='hive')
+
+
+def dataset_signature(path: Path = ENRICHED_DATASET_PATH) -> tuple:
+    """Cheap signature of the dataset version in use, changed by every rewrite."""
+    path = Path(path)
+    compact_path = path / COMPACT_FILE # written last, when a version is complete
+    return (str(path.resolve()), compact_path.stat().st_mtime_ns if compact_path.exists() else None)
+
+
+def read_compact_schema(path: Path = ENRICHED_DATASET_PATH) -> dict | None:
+    """Compaction settings stored with the dataset, None for a dataset written without them."""
+    compact_path = Path(path) / COMPACT_FILE
+    if not compact_path.exists():
+        return None
+    return json.loads(compact_path.read_text())
+
+
+def read_dataset_columns(path: Path, columns: list[str]) -> pd.DataFrame:
+    """Read only the given columns of the whole dataset."""
+    return _dataset(path).to_table(columns=columns).to_pandas()
+
+
+def read_dataset_places(path: Path = ENRICHED_DATASET_PATH) -> pd.DataFrame:
+    """Read place ids, names and publish time bounds, touching only those columns."""
+    table = _dataset(path).to_table(columns=['place_id', 'place_name', 'publish_time'])
+    places = (table.to_pandas()
+              .astype({'place_id': str})
+              .groupby(['place_id', 'place_name'], sort=False, observed=True)['publish_time']
+              .agg(min_time='min', max_time='max')
+              .reset_index())
+    return places
+
+
+def read_enriched_dataset(path: Path = ENRICHED_DATASET_PATH,
+                          place_ids: list[str] | None = None,
+                          start_date: dt.date | None = None,
+                          end_date: dt.date | None = None) -> pd.DataFrame:
+    """Read the slice of the dataset for the given places and inclusive date range.
+
+    Place and month conditions prune partitions, the publish_time condition skips row groups.
+    """
+    import pyarrow.dataset as ds
+
+    conditions = []
+    if place_ids:
+        conditions.append(ds.field('place_id').isin(list(place_ids)))
+    if start_date is not None:
+        conditions.append(ds.field('publish_month') >= start_date.strftime('%Y-%m'))
+        conditions.append(ds.field('publish_time') >= _start_of_day(start_date))
+    if end_date is not None:
+        conditions.append(ds.field('publish_month') <= end_date.strftime('%Y-%m'))
+        conditions.append(ds.field('publish_time') < _start_of_day(end_date + dt.timedelta(days=1)))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    df = _dataset(path).to_table(filter=expression).to_pandas()
+    df = df.drop(columns='publish_month').astype({'place_id': str})
+    if 'clean_tokens' in df.columns:
+        df = encode_token_column(df)
+        df.attrs[SEARCH_INDEX_ATTR] = build_search_index(df)
+    schema = read_compact_schema(path)
+    if schema is None:
+        logger.warning(f'No {COMPACT_FILE} in the enriched dataset, compact dtypes are decided per slice')
+    df = compact_data(df, categories=schema['categories'] if schema else None)
+    logger.info(f'Read {len(df)} records from enriched dataset')
+    return df
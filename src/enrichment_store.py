@@ -0,0 +1,121 @@
+# src/enrichment_store.py
+
+import hashlib
+import time
+from importlib import metadata
+from pathlib import Path
+
+import pandas as pd
+
+from src.config import ENRICHMENT_STORE_PATH, SENTIMENT_BACKEND, SENTIMENT_MODEL, SPACY_MODEL
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+STORE_KEY = ['review_id', 'content_hash']
+STORE_COLUMNS = ['clean_tokens', 'sentiment_label', 'sentiment_score', 'weighted_sentiment', 'Positive', 'Neutral', 'Negative']
+STORE_MAX_PARTS = 64 # appended parts are merged into one above this count
+FINGERPRINT_FILE = 'FINGERPRINT' # pipeline fingerprint of the latest write
+
+
+def _package_version(package: str) -> str:
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+def pipeline_fingerprint() -> str:
+    """Describe the models and libraries whose output is kept in the store."""
+    return ';'.join([
+        f'sentiment={SENTIMENT_MODEL}',
+        f'backend={SENTIMENT_BACKEND}',
+        f'transformers={_package_version("transformers")}',
+        f'spacy={_package_version("spacy")}',
+        f'spacy_model={SPACY_MODEL}@{_package_version(SPACY_MODEL)}',
+    ])
+
+
+def store_fingerprint(path: Path = ENRICHMENT_STORE_PATH) -> str | None:
+    """Pipeline fingerprint the store was last written with, None for stores that predate it.
+
+    A serving host hashes with it instead of its own, which describes libraries and models
+    that need not be installed there.
+    """
+    fingerprint_path = Path(path) / FINGERPRINT_FILE
+    return fingerprint_path.read_text(encoding='utf-8') if fingerprint_path.exists() else None
+
+
+def _write_fingerprint(path: Path) -> None:
+    tmp_path = path / f'{FINGERPRINT_FILE}.tmp'
+    tmp_path.write_text(pipeline_fingerprint(), encoding='utf-8')
+    tmp_path.replace(path / FINGERPRINT_FILE)
+
+
+def content_hashes(texts: pd.Series, fingerprint: str | None = None) -> pd.Series:
+    """Hash normalized review texts together with the pipeline fingerprint."""
+    fingerprint = fingerprint or pipeline_fingerprint()
+    return texts.map(
+        lambda text: hashlib.sha1(f'{fingerprint}\x1f{text}'.encode('utf-8')).hexdigest()
+    )
+
+
+def _part_paths(path: Path) -> list[Path]:
+    return sorted(path.glob('part-*.pkl'))
+
+
+def load_store(path: Path = ENRICHMENT_STORE_PATH) -> pd.DataFrame:
+    """Load previously enriched reviews, or an empty frame if there is no usable store."""
+    path = Path(path)
+    parts = _part_paths(path)
+    if not parts:
+        logger.info(f'No enrichment store found at: {path}')
+        return pd.DataFrame(columns=STORE_KEY)
+    try:
+        store = pd.concat([pd.read_pickle(part) for part in parts], ignore_index=True)
+        # later parts hold the newest enrichment of a review
+        store = store.drop_duplicates(subset='review_id', keep='last').reset_index(drop=True)
+        logger.info(f'Enrichment store loaded with {len(store)} records from {len(parts)} parts')
+        return store
+    except Exception:
+        logger.error(f'Error loading enrichment store, it will be rebuilt', exc_info=True)
+        return pd.DataFrame(columns=STORE_KEY)
+
+
+def _write_part(df: pd.DataFrame, path: Path) -> Path:
+    """Write a part atomically so an interrupted write never corrupts the store."""
+    path.mkdir(parents=True, exist_ok=True)
+    part_path = path / f'part-{time.time_ns()}.pkl'
+    tmp_path = part_path.with_suffix('.tmp')
+    df.reset_index(drop=True).to_pickle(tmp_path)
+    tmp_path.replace(part_path)
+    return part_path
+
+
+def append_store(fresh: pd.DataFrame, path: Path = ENRICHMENT_STORE_PATH) -> None:
+    """Append freshly enriched reviews as a new part, compacting when parts pile up."""
+    path = Path(path)
+    _write_part(fresh, path)
+    _write_fingerprint(path)
+    logger.info(f'Appended {len(fresh)} records to enrichment store: {path}')
+    if len(_part_paths(path)) > STORE_MAX_PARTS:
+        save_store(load_store(path), path)
+
+
+def save_store(store: pd.DataFrame, path: Path = ENRICHMENT_STORE_PATH) -> None:
+    """Rewrite the whole store as a single part."""
+    path = Path(path)
+    stale_parts = _part_paths(path)
+    _write_part(store, path)
+    _write_fingerprint(path)
+    for part in stale_parts:
+        part.unlink()
+    logger.info(f'Enrichment store saved with {len(store)} records to: {path}')
+
+
+def split_cached(df: pd.DataFrame, store: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Split hashed reviews into ones already in the store and ones that need inference."""
+    if store.empty:
+        return pd.DataFrame(columns=STORE_KEY + STORE_COLUMNS), df
+    cached = pd.merge(df[STORE_KEY], store, on=STORE_KEY, how='inner')
+    missing = df[~df['review_id'].isin(cached['review_id'])]
+    return cached, missing
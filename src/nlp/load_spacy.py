@@ -1,20 +1,34 @@
 # src/nlp/load_spacy.py
 
 from functools import lru_cache
-import spacy
 
+from src.config import SPACY_MODEL
 from src.utils.logger import get_logger
 logger = get_logger(__name__)
 
-@lru_cache(maxsize=1)
-def load_spacy_model():
-    logger.info("Loading spaCy model: pl_core_news_md")
+# Components not needed for lemma_, is_stop and is_alpha (the lemmatizer relies on tok2vec, tagger/morphologizer and attribute_ruler)
+LEMMATIZER_UNUSED_PIPES = ('parser', 'ner', 'senter')
+
+def _load(**options):
+    import spacy # imported on first use, readers of enriched data never need it
+
+    logger.info(f"Loading spaCy model: {SPACY_MODEL} {options or ''}")
     try:
-        nlp = spacy.load("pl_core_news_md")
-        logger.info("spaCy model loaded successfully")
+        nlp = spacy.load(SPACY_MODEL, **options)
+        logger.info(f"spaCy model loaded successfully with pipes: {nlp.pipe_names}")
         return nlp
     except Exception as e:
         logger.error(f"Error loading spaCy model: {e}")
         raise e # may be unnecessary
-    
-    # CHANGE OF MODEL IS NEEDED IN FUTURE (faulty lemmatization of some words, maybe Stanza?)
\ No newline at end of file
+
+    # CHANGE OF MODEL IS NEEDED IN FUTURE (faulty lemmatization of some words, maybe Stanza?)
+
+@lru_cache(maxsize=1)
+def load_spacy_model():
+    """Load the full spaCy pipeline once per process."""
+    return _load()
+
+@lru_cache(maxsize=1)
+def load_spacy_lemmatizer():
+    """Load a separate spaCy pipeline without the components lemmatization does not use."""
+    return _load(exclude=list(LEMMATIZER_UNUSED_PIPES))
@@ -1,17 +1,28 @@
 # src/nlp/preprocess.py
 
-from .load_spacy import load_spacy_model
+from typing import Iterable, Iterator
+
+from .load_spacy import load_spacy_lemmatizer
+
+def _clean_tokens(doc) -> list[str]:
+    return [token.lemma_.lower() for token in doc if not token.is_stop and token.is_alpha]
 
 def preprocess_text(text: str):
     """Preprocess the input text using SpaCy model."""
-    nlp = load_spacy_model()
+    nlp = load_spacy_lemmatizer()
     doc = nlp(text)
     
-    clean_tokens = [token.lemma_.lower() for token in doc if not token.is_stop and token.is_alpha]
+    clean_tokens = _clean_tokens(doc)
     return {'clean_tokens': clean_tokens} # return a dict with value as list of tokens
 
+def preprocess_texts(texts: Iterable[str], batch_size: int = 256, n_process: int = 1) -> Iterator[list[str]]:
+    """Stream texts through SpaCy in batches, yielding clean tokens in input order."""
+    nlp = load_spacy_lemmatizer()
+    for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+        yield _clean_tokens(doc)
+
 def extract_ngrams(tokens: tuple, n: int):
     """"Extract n-grams from a list(tuple) of tokens."""
     if len(tokens) < n:
         return []
-    return [tokens[i:i+n] for i in range(len(tokens) - n + 1)] # - n + 1 for proper extraction of last n-gram     
\ No newline at end of file
+    return [tokens[i:i+n] for i in range(len(tokens) - n + 1)] # - n + 1 for proper extraction of last n-gram     
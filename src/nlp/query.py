@@ -0,0 +1,44 @@
+# src/nlp/query.py
+
+import re
+from bisect import bisect_left
+
+WORD_PATTERN = re.compile(r'[^\W\d_]+') # runs of letters, like spaCy's is_alpha tokens
+MIN_FUZZY_LENGTH = 4 # shorter words must match a lemma exactly
+MAX_SUFFIX = 3 # inflectional ending a word may differ from its lemma by
+
+
+def _closest_lemma(word: str, sorted_vocab: list[str]) -> str | None:
+    """Lemma sharing the longest prefix with word, at least all but its last MAX_SUFFIX letters."""
+    min_prefix = max(MIN_FUZZY_LENGTH - 1, len(word) - MAX_SUFFIX)
+    stem = word[:min_prefix]
+    best, best_key = None, None
+    for lemma in sorted_vocab[bisect_left(sorted_vocab, stem):]:
+        if not lemma.startswith(stem):
+            break
+        prefix = len(stem)
+        while prefix < min(len(word), len(lemma)) and word[prefix] == lemma[prefix]:
+            prefix += 1
+        # longest shared prefix first, then the lemma with the shortest ending of its own
+        key = (-prefix, len(lemma) - prefix)
+        if best_key is None or key < best_key:
+            best, best_key = lemma, key
+    return best
+
+
+def lexicon_tokens(text: str, vocab_index: dict[str, int], sorted_vocab: list[str]) -> list[str]:
+    """Map a search query onto indexed lemmas without loading spaCy.
+
+    Words found in the vocabulary are kept as they are, longer inflected forms are mapped to the
+    lemma with the same stem, and anything else (stop words, unknown words) is dropped, as it
+    could not match a review anyway.
+    """
+    tokens = []
+    for word in WORD_PATTERN.findall(text.lower()):
+        if word in vocab_index:
+            tokens.append(word)
+        elif len(word) >= MIN_FUZZY_LENGTH:
+            lemma = _closest_lemma(word, sorted_vocab)
+            if lemma is not None:
+                tokens.append(lemma)
+    return tokens
@@ -0,0 +1,108 @@
+# src/nlp/tokens.py
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+CORPUS_ATTR = 'token_corpus' # key of the TokenCorpus in DataFrame.attrs
+TOKEN_ROW = 'token_row' # column pointing each review at its row in the corpus
+
+
+class TokenCorpus:
+    """Clean tokens of many reviews stored as int32 ids over a shared lemma vocabulary.
+
+    Row i holds ids[offsets[i]:offsets[i + 1]] (CSR layout). The corpus is immutable,
+    so copies of a DataFrame can share it.
+    """
+
+    def __init__(self, vocab: list[str], ids: np.ndarray, offsets: np.ndarray):
+        self.vocab = vocab
+        self.ids = ids
+        self.offsets = offsets
+        self._vocab_index = None
+
+    @classmethod
+    def from_token_lists(cls, token_lists: Iterable) -> 'TokenCorpus':
+        """Encode an iterable of token sequences, treating missing values as empty rows."""
+        token_lists = [tokens if isinstance(tokens, (tuple, list, np.ndarray)) else () for tokens in token_lists]
+        vocab_index = {}
+        lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=len(token_lists))
+        offsets = np.zeros(len(token_lists) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        ids = np.fromiter(
+            (vocab_index.setdefault(token, len(vocab_index)) for tokens in token_lists for token in tokens),
+            dtype=np.int32, count=int(offsets[-1])
+        )
+        return cls(list(vocab_index), ids, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __deepcopy__(self, memo):
+        return self # immutable, pandas deep-copies attrs on every slice
+
+    @property
+    def vocab_index(self) -> dict[str, int]:
+        if self._vocab_index is None:
+            self._vocab_index = {token: i for i, token in enumerate(self.vocab)}
+        return self._vocab_index
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def row(self, i: int) -> np.ndarray:
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def decode(self, i: int) -> tuple[str, ...]:
+        """Decode one row back to its lemma strings."""
+        return tuple(self.vocab[token_id] for token_id in self.row(i))
+
+    def encode(self, tokens: Iterable[str]) -> np.ndarray:
+        """Map tokens to ids, -1 for tokens outside the vocabulary."""
+        return np.array([self.vocab_index.get(token, -1) for token in tokens], dtype=np.int32)
+
+    def take(self, rows: np.ndarray) -> 'TokenCorpus':
+        """Sub-corpus of the given rows, in that order, sharing the vocabulary."""
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        gather = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return TokenCorpus(self.vocab, self.ids[gather], offsets)
+
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.offsets.nbytes + sum(len(token) for token in self.vocab)
+
+
+def encode_token_column(df: pd.DataFrame, column: str = 'clean_tokens') -> pd.DataFrame:
+    """Replace a column of token tuples by token_row and a shared TokenCorpus in df.attrs."""
+    corpus = TokenCorpus.from_token_lists(df[column])
+    df = df.drop(columns=column)
+    df[TOKEN_ROW] = np.arange(len(df), dtype=np.int32)
+    df.attrs[CORPUS_ATTR] = corpus
+    return df
+
+
+def get_token_corpus(df: pd.DataFrame) -> TokenCorpus:
+    """TokenCorpus holding the tokens of df's rows, in row order.
+
+    DataFrame.attrs is experimental in pandas: merge and concat may drop it or keep the attrs of
+    another frame, so the corpus is checked against the token_row column before it is used.
+    """
+    if TOKEN_ROW in df.columns:
+        corpus = df.attrs.get(CORPUS_ATTR)
+        if not isinstance(corpus, TokenCorpus):
+            raise KeyError(f'DataFrame has a {TOKEN_ROW} column but no TokenCorpus in attrs[{CORPUS_ATTR!r}], '
+                           'it was likely dropped by a merge or concat')
+        rows = df[TOKEN_ROW].to_numpy()
+        if len(rows) and (rows.min() < 0 or rows.max() >= len(corpus)):
+            raise ValueError(f'{TOKEN_ROW} points outside the TokenCorpus in attrs, it belongs to another frame')
+        if len(rows) == len(corpus) and np.array_equal(rows, np.arange(len(corpus))):
+            return corpus
+        return corpus.take(rows)
+    if 'clean_tokens' in df.columns:
+        return TokenCorpus.from_token_lists(df['clean_tokens'])
+    raise KeyError('DataFrame has neither encoded tokens nor a clean_tokens column')
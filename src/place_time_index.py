@@ -0,0 +1,81 @@
+# src/place_time_index.py
+
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from src.utils.logger import get_logger
+logger = get_logger(__name__)
+
+PLACE_TIME_INDEX_ATTR = 'place_time_index' # key of the PlaceTimeIndex in DataFrame.attrs
+MISSING_TIME = np.iinfo(np.int64).max # reviews without publish time sort last within their place
+
+
+def sort_by_place_time(df: pd.DataFrame) -> pd.DataFrame:
+    """Order reviews by place, then publish time, so each place is one sorted block."""
+    return df.sort_values(['place_id', 'publish_time'], kind='stable', na_position='last').reset_index(drop=True)
+
+
+class PlaceTimeIndex:
+    """Row ranges of each place in a frame sorted by (place_id, publish_time).
+
+    A place and date selection is a binary search per place, and the rows are taken as one
+    slice when the selected blocks are adjacent.
+    """
+
+    def __init__(self, blocks: dict[str, tuple[int, int]], times: np.ndarray, tz):
+        self.blocks = blocks
+        self.times = times # publish_time as UTC nanoseconds
+        self.tz = tz
+
+    def __deepcopy__(self, memo):
+        return self # immutable, pandas deep-copies attrs on every slice
+
+    def nbytes(self) -> int:
+        return self.times.nbytes + sum(len(place_id) + 16 for place_id in self.blocks)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'PlaceTimeIndex':
+        place_ids = df['place_id'].astype(str).to_numpy()
+        starts = np.flatnonzero(np.r_[True, place_ids[1:] != place_ids[:-1]]) if len(df) else np.array([], dtype=np.int64)
+        stops = np.r_[starts[1:], len(df)]
+        blocks = {place_ids[start]: (int(start), int(stop)) for start, stop in zip(starts, stops)}
+        if len(blocks) != len(starts):
+            raise ValueError('Frame is not sorted by place_id, see sort_by_place_time')
+        publish_time = df['publish_time']
+        utc = publish_time.dt.tz_convert('UTC').dt.tz_localize(None) if publish_time.dt.tz is not None else publish_time
+        ns = utc.to_numpy(dtype='datetime64[ns]')
+        times = np.where(np.isnat(ns), MISSING_TIME, ns.view(np.int64))
+        logger.info(f'Place time index built for {len(blocks)} places')
+        return cls(blocks, times, publish_time.dt.tz)
+
+    def _day_start(self, date: dt.date) -> int:
+        """First nanosecond of the calendar day in the frame's time zone."""
+        return pd.Timestamp(date, tz=self.tz).value
+
+    def row_ranges(self, place_ids, start_date: dt.date, end_date: dt.date) -> list[tuple[int, int]]:
+        """Sorted, merged row ranges of the places published within the inclusive date range."""
+        start, end = self._day_start(start_date), self._day_start(end_date + dt.timedelta(days=1))
+        ranges = []
+        for place_id in place_ids:
+            if str(place_id) not in self.blocks:
+                continue
+            block_start, block_stop = self.blocks[str(place_id)]
+            lo, hi = np.searchsorted(self.times[block_start:block_stop], [start, end]) + block_start
+            if hi > lo:
+                ranges.append((int(lo), int(hi)))
+        merged = []
+        for lo, hi in sorted(ranges):
+            if merged and lo <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(hi, merged[-1][1]))
+            else:
+                merged.append((lo, hi))
+        return merged
+
+    def select(self, df: pd.DataFrame, place_ids, start_date: dt.date, end_date: dt.date) -> pd.DataFrame:
+        """Rows of the indexed frame for the places and inclusive date range, as a slice when contiguous."""
+        ranges = self.row_ranges(place_ids, start_date, end_date)
+        if len(ranges) == 1:
+            return df.iloc[ranges[0][0]:ranges[0][1]]
+        return df.iloc[np.concatenate([np.arange(lo, hi) for lo, hi in ranges])] if ranges else df.iloc[:0]
@@ -2,7 +2,8 @@
 
 import pandas as pd
 
-from src.nlp.preprocess import preprocess_text
+from src.config import TOKENIZE_BATCH_SIZE, TOKENIZE_N_PROCESS
+from src.nlp.preprocess import preprocess_texts
 
 from src.utils.logger import get_logger
 logger = get_logger(__name__)
@@ -17,7 +18,7 @@ def format_data(df: pd.DataFrame) -> pd.DataFrame:
     df = df.drop_duplicates().copy()
     df['publish_time'] = pd.to_datetime(df['publish_time'], errors='coerce')
     df['reply_publish_time'] = pd.to_datetime(df['reply_publish_time'], errors='coerce')
-    df['rating'] = pd.to_numeric(df['rating'], errors='coerce')
+    df['rating'] = pd.to_numeric(df['rating'], errors='coerce').astype('float64') # same dtype whether or not ratings are missing
     
     logger.info('Data formatting process completed')
     
@@ -39,15 +40,61 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     
     return df
 
-def tokenize_texts(df: pd.DataFrame) -> pd.DataFrame:
+def tokenize_texts(df: pd.DataFrame, batch_size: int = TOKENIZE_BATCH_SIZE, n_process: int = TOKENIZE_N_PROCESS) -> pd.DataFrame:
     """Tokenize and preprocess the 'review_text' column using SpaCy."""
     
-    logger.info('Starting text tokenization...')
+    logger.info(f'Starting text tokenization (batch_size={batch_size}, n_process={n_process})...')
     if df.empty:
         logger.warning('Input DataFrame is empty')
         return df
     df = df.copy()
-    df['clean_tokens'] = df['review_text'].apply(lambda x: preprocess_text(x)['clean_tokens']).apply(tuple)
+    df['clean_tokens'] = [
+        tuple(tokens) for tokens in preprocess_texts(df['review_text'], batch_size=batch_size, n_process=n_process)
+    ]
     logger.info('Text tokenization completed')
     return df[['review_id', 'clean_tokens']]   
-    
\ No newline at end of file
+    
+CATEGORY_CANDIDATES = ['place_name', 'place_id', 'author_name', 'sentiment_label']
+MAX_CATEGORY_RATIO = 0.5 # distinct values per row up to which a string column becomes categorical
+
+def compact_data(df: pd.DataFrame, max_category_ratio: float = MAX_CATEGORY_RATIO, categories: list[str] | None = None) -> pd.DataFrame:
+    """Store the enriched DataFrame in compact dtypes without changing its values.
+
+    categories fixes the columns stored as categoricals, e.g. decided once for a whole dataset
+    so all its slices share one schema; by default they are decided on df itself.
+    """
+    
+    logger.info('Starting data compaction...')
+    if df.empty:
+        logger.warning('Input DataFrame is empty')
+        return df
+    df = df.copy()
+    # low-cardinality strings -> categoricals
+    if categories is None:
+        categories = [col for col in CATEGORY_CANDIDATES
+                      if col in df.columns and df[col].nunique() <= max_category_ratio * len(df)]
+    for col in categories:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    # one-hot columns are missing only for reviews without text, which count as 0 in every sum
+    for col in ['Positive', 'Neutral', 'Negative']:
+        if col in df.columns:
+            df[col] = df[col].fillna(0).astype('int8')
+    for col in ['sentiment_score', 'weighted_sentiment']:
+        if col in df.columns:
+            df[col] = df[col].astype('float32')
+    logger.info('Data compaction completed')
+    
+    return df
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """Bytes per column before and after compaction."""
+    
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'bytes_before': before.memory_usage(index=False, deep=True),
+        'dtype_after': after.dtypes.astype(str),
+        'bytes_after': after.memory_usage(index=False, deep=True),
+    })
+    report.loc['TOTAL', ['bytes_before', 'bytes_after']] = report[['bytes_before', 'bytes_after']].sum()
+    return report
@@ -1,13 +1,191 @@
 # src/sentiment_analysis.py
 
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+import numpy as np
 import pandas as pd
-from transformers import pipeline
 
+from src.config import (SENTIMENT_MODEL, SENTIMENT_BACKEND, SENTIMENT_ONNX_PATH, SENTIMENT_BATCH_SIZE,
+                        SENTIMENT_MAX_LENGTH, SENTIMENT_NUM_THREADS, SENTIMENT_WORKERS)
 from src.utils.logger import get_logger
 logger = get_logger(__name__)
 
+if TYPE_CHECKING:
+    import torch
+
+
+class SentimentClassifier:
+    """Sentiment classifier loaded once and run over length-bucketed batches.
+
+    torch and transformers are imported when the classifier is built, so importing this module
+    stays cheap for processes that only read enriched data.
+    """
+
+    def __init__(self,
+                 model_name: str = SENTIMENT_MODEL,
+                 batch_size: int = SENTIMENT_BATCH_SIZE,
+                 max_length: int = SENTIMENT_MAX_LENGTH,
+                 num_threads: int = SENTIMENT_NUM_THREADS,
+                 backend: str = SENTIMENT_BACKEND):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        if num_threads > 0:
+            torch.set_num_threads(num_threads)
+        logger.info(f'Loading sentiment model: {model_name} (backend: {backend}, torch threads: {torch.get_num_threads()})')
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.model.eval()
+        self.model_name = model_name
+        self.id2label = self.model.config.id2label
+        self.batch_size = batch_size
+        self.max_length = min(max_length, self.tokenizer.model_max_length)
+        self.session = None
+        self.backend = self._setup_backend(backend, num_threads)
+
+    def _setup_backend(self, backend: str, num_threads: int) -> str:
+        """Prepare the selected inference backend, falling back to fp32 torch."""
+        import torch
+
+        if backend == 'torch-int8':
+            self.model = torch.ao.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+            return backend
+        if backend == 'onnx':
+            try:
+                self.session = self._onnx_session(num_threads)
+                self.model = None # the torch weights are not needed once the session is open
+                return backend
+            except ImportError:
+                logger.warning('onnxruntime is not installed, falling back to torch backend')
+            except Exception:
+                logger.error('Error preparing ONNX backend, falling back to torch backend', exc_info=True)
+            return 'torch'
+        if backend != 'torch':
+            logger.warning(f'Unknown sentiment backend: {backend}, falling back to torch backend')
+        return 'torch'
+
+    def _onnx_session(self, num_threads: int):
+        """Export the model to ONNX once per model and open an onnxruntime CPU session on it."""
+        import onnxruntime as ort
+        import torch
+
+        path = SENTIMENT_ONNX_PATH
+        # the export records the model it came from, another model (or revision) is exported again
+        meta_path = path.with_suffix('.json')
+        source = {'model': self.model_name, 'revision': getattr(self.model.config, '_commit_hash', None)}
+        exported = json.loads(meta_path.read_text()) if meta_path.exists() else None
+        if not path.exists() or exported != source:
+            logger.info(f'Exporting sentiment model {self.model_name} to ONNX: {path}')
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.onnx.tmp')
+            dummy = dict(self.tokenizer(['Przykładowa recenzja.'], return_tensors='pt'))
+            torch.onnx.export(
+                self.model, (dummy,), str(tmp_path),
+                input_names=list(dummy),
+                output_names=['logits'],
+                dynamic_axes={**{name: {0: 'batch', 1: 'sequence'} for name in dummy}, 'logits': {0: 'batch'}},
+                opset_version=17,
+            )
+            tmp_path.replace(path)
+            meta_path.write_text(json.dumps(source))
+        options = ort.SessionOptions()
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        return ort.InferenceSession(str(path), options, providers=['CPUExecutionProvider'])
+
+    def _batches(self, texts: list[str]):
+        """Yield (positions, padded batch) with texts of similar length grouped together."""
+        encodings = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        lengths = np.fromiter((len(ids) for ids in encodings['input_ids']), dtype=np.int64, count=len(texts))
+        order = np.argsort(lengths, kind='stable')
+        for start in range(0, len(order), self.batch_size):
+            positions = order[start:start + self.batch_size]
+            features = {key: [encodings[key][i] for i in positions] for key in encodings.keys()}
+            yield positions, self.tokenizer.pad(features, return_tensors='pt')
+
+    def _logits(self, batch) -> 'torch.Tensor':
+        import torch
+
+        if self.session is not None:
+            inputs = {node.name: batch[node.name].numpy() for node in self.session.get_inputs()}
+            return torch.from_numpy(self.session.run(['logits'], inputs)[0])
+        return self.model(**batch).logits
+
+    def predict(self, texts: list[str]) -> tuple[list[str], np.ndarray]:
+        """Return the top label and its probability for every text, in input order."""
+        import torch
 
-def analyze_sentiments(df: pd.DataFrame) -> pd.DataFrame:
+        label_ids = np.zeros(len(texts), dtype=np.int64)
+        scores = np.zeros(len(texts), dtype=np.float64)
+        with torch.inference_mode():
+            for positions, batch in self._batches(texts):
+                probs = torch.softmax(self._logits(batch).float(), dim=-1)
+                best = probs.max(dim=-1)
+                scores[positions] = best.values.numpy()
+                label_ids[positions] = best.indices.numpy()
+        return [self.id2label[int(i)] for i in label_ids], scores
+
+
+@lru_cache(maxsize=1)
+def _load_classifier(num_threads: int, batch_size: int) -> SentimentClassifier:
+    return SentimentClassifier(num_threads=num_threads, batch_size=batch_size)
+
+def get_classifier(num_threads: int = SENTIMENT_NUM_THREADS, batch_size: int = SENTIMENT_BATCH_SIZE) -> SentimentClassifier:
+    """Return the process-wide sentiment classifier, loading it on first use."""
+    # lru_cache keys on how the arguments were passed, call it positionally so every caller shares the model
+    return _load_classifier(num_threads, batch_size)
+
+
+# --- PROCESS POOL ---
+_worker_threads = SENTIMENT_NUM_THREADS
+_worker_batch_size = SENTIMENT_BATCH_SIZE
+
+def _init_worker(num_threads: int, batch_size: int):
+    """Load a model copy pinned to num_threads in every pool worker."""
+    global _worker_threads, _worker_batch_size
+    _worker_threads, _worker_batch_size = num_threads, batch_size
+    get_classifier(num_threads, batch_size)
+
+def _predict_shard(shard: pd.DataFrame) -> pd.DataFrame:
+    labels, scores = get_classifier(_worker_threads, _worker_batch_size).predict(shard['review_text'].tolist())
+    return pd.DataFrame({'review_id': shard['review_id'].to_numpy(), 'sentiment_label': labels, 'sentiment_score': scores})
+
+def sentiment_pool(n_workers: int, batch_size: int = SENTIMENT_BATCH_SIZE) -> ProcessPoolExecutor:
+    """Pool of worker processes holding one model copy each, reusable across predict_sharded calls."""
+    num_threads = SENTIMENT_NUM_THREADS or max(1, (os.cpu_count() or 1) // n_workers)
+    logger.info(f'Starting {n_workers} sentiment workers with {num_threads} torch threads each')
+    # spawn avoids forking a process that may already hold torch thread pools
+    return ProcessPoolExecutor(max_workers=n_workers,
+                               mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_worker,
+                               initargs=(num_threads, batch_size))
+
+def predict_sharded(df: pd.DataFrame, n_workers: int, batch_size: int = SENTIMENT_BATCH_SIZE,
+                    pool: ProcessPoolExecutor | None = None) -> pd.DataFrame:
+    """Split reviews into row ranges and classify them in a pool of worker processes.
+
+    A pool started for this call only is shut down afterwards, pass one from sentiment_pool to keep the models loaded.
+    """
+    shards = [df.iloc[start:stop] for start, stop in _row_ranges(len(df), n_workers)]
+    logger.info(f'Sharding {len(df)} records across {len(shards)} workers')
+    if pool is not None:
+        return pd.concat(list(pool.map(_predict_shard, shards)), ignore_index=True)
+    with sentiment_pool(len(shards), batch_size) as pool:
+        results = list(pool.map(_predict_shard, shards))
+    return pd.concat(results, ignore_index=True)
+
+def _row_ranges(n_rows: int, n_shards: int) -> list[tuple[int, int]]:
+    bounds = np.linspace(0, n_rows, min(n_shards, n_rows) + 1).astype(int)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def analyze_sentiments(df: pd.DataFrame, n_workers: int = SENTIMENT_WORKERS, batch_size: int = SENTIMENT_BATCH_SIZE,
+                       pool: ProcessPoolExecutor | None = None) -> pd.DataFrame:
     """Perform sentiment analysis on the 'review_text' column of the DataFrame."""
     df = df.copy()
 
@@ -16,13 +194,13 @@ def analyze_sentiments(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         logger.warning('Input DataFrame is empty')
         return df
-    logger.debug(f'Fetching model...')
-    classifier = pipeline('sentiment-analysis',
-                          model='quikli/sentience-sentiment_analysis')
-    results = classifier(df['review_text'].tolist())
-
-    df['sentiment_label'] = [res['label'] for res in results]
-    df['sentiment_score'] = [res['score'] for res in results]
+    if n_workers > 1:
+        df = pd.merge(df, predict_sharded(df[['review_id', 'review_text']], n_workers, batch_size, pool), on='review_id', how='left')
+    else:
+        logger.debug(f'Fetching model...')
+        labels, scores = get_classifier(SENTIMENT_NUM_THREADS, batch_size).predict(df['review_text'].tolist())
+        df['sentiment_label'] = labels
+        df['sentiment_score'] = scores
     df['weighted_sentiment'] = df['sentiment_score'] * \
         df['sentiment_label'].map(
             {'Positive': 1, 'Neutral': 0, 'Negative': -1})
@@ -0,0 +1,63 @@
+# src/visualizations/downsample.py
+
+import numpy as np
+
+
+def lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of n_out points that keep the shape of y.
+
+    Points are assumed evenly spaced on x. The first and last points are always kept, and
+    each bucket in between keeps the point forming the largest triangle with the point kept
+    before it and the mean of the next bucket.
+    """
+    n = len(y)
+    n_out = max(n_out, 3)
+    if n_out >= n:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64) # n_out - 2 inner buckets
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for b in range(n_out - 2):
+        start, stop = edges[b], edges[b + 1]
+        next_start, next_stop = stop, edges[b + 2] if b + 2 < len(edges) else n
+        next_x, next_y = x[next_start:next_stop].mean(), y[next_start:next_stop].mean()
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        kept[b + 1] = previous
+    return kept
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the minimum and maximum of each of n_out // 2 buckets, plus both ends."""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    n_buckets = max(n_out // 2, 1)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    kept = [0, n - 1]
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if stop > start:
+            kept += [start + int(np.argmin(y[start:stop])), start + int(np.argmax(y[start:stop]))]
+    return np.unique(kept)
+
+
+DOWNSAMPLERS = {'lttb': lttb_indices, 'minmax': minmax_indices}
+
+
+def downsample_indices(series: list[np.ndarray], n_out: int, method: str = 'lttb') -> np.ndarray:
+    """Sorted row indices to keep so every series keeps its shape within about n_out points.
+
+    Missing values are skipped, and series sharing the x axis split the budget and keep
+    the union of their points, so every kept row holds exact values for all of them.
+    """
+    if method not in DOWNSAMPLERS:
+        return np.arange(len(series[0])) if series else np.array([], dtype=np.int64)
+    budget = max(n_out // max(len(series), 1), 3)
+    kept = []
+    for y in series:
+        valid = np.flatnonzero(~np.isnan(y))
+        kept.append(valid[DOWNSAMPLERS[method](y[valid], budget)])
+    return np.unique(np.concatenate(kept)) if kept else np.array([], dtype=np.int64)
@@ -1,28 +1,110 @@
 # src/visualizations/plots.py
 
+import math
+
 import altair as alt
+import numpy as np
 import pandas as pd
 
+from src.config import CHART_MAX_PERIODS, CHART_WIDTH_PX, TREND_DOWNSAMPLE, TREND_POINTS_PER_PX
+from src.visualizations.downsample import downsample_indices
+
 # --- MAIN PAGE CHARTS ---
+# Charts get one finished row per period and mark: periods are labelled here and no
+# aggregate or timeUnit transform is left for Vega, so the spec carries only what is drawn.
+SENTIMENT_COLUMNS = ['Positive', 'Neutral', 'Negative']
+RATIO_COLUMNS = ['positive_ratio', 'neutral_ratio', 'negative_ratio']
+
+# Labels matching the Vega time units the pages use, weeks start on Sunday as in Vega
+# (also used as d3 axis formats, %q is the quarter there)
+PERIOD_FORMATS = {
+    'yearmonthdate': '%Y-%m-%d',
+    'yearweek': '%Y-W%U',
+    'yearmonth': '%Y-%m',
+    'yearquarter': '%Y Q%q',
+    'year': '%Y',
+}
+
+# Length of each time unit, bars span their whole period on the temporal axis
+PERIOD_OFFSETS = {
+    'yearmonthdate': pd.DateOffset(days=1),
+    'yearweek': pd.DateOffset(weeks=1),
+    'yearmonth': pd.DateOffset(months=1),
+    'yearquarter': pd.DateOffset(months=3),
+    'year': pd.DateOffset(years=1),
+}
+
+def period_labels(times: pd.Series, time_unit: str) -> pd.Series:
+    """Format period timestamps as the labels shown on the x axis."""
+    
+    if time_unit == 'yearquarter':
+        return times.dt.year.astype(str) + ' Q' + times.dt.quarter.astype(str)
+    return times.dt.strftime(PERIOD_FORMATS[time_unit])
+
+def cap_periods(df: pd.DataFrame, sum_columns: list[str], last_columns: list[str], max_periods: int = CHART_MAX_PERIODS) -> pd.DataFrame:
+    """Merge consecutive periods so at most max_periods are charted.
+
+    Counts are summed, cumulative metrics keep their value at the end of the merged
+    periods, which is labelled by its first period.
+    """
+    
+    if len(df) <= max_periods:
+        return df
+    group_size = math.ceil(len(df) / max_periods)
+    agg_dict = {col: 'first' for col in df.columns.difference(sum_columns + last_columns)}
+    agg_dict.update({col: 'sum' for col in sum_columns} | {col: 'last' for col in last_columns})
+    return df.groupby(np.arange(len(df)) // group_size).agg(agg_dict).reset_index(drop=True)
+
+def _time_strings(times: pd.Series) -> np.ndarray:
+    return times.dt.strftime('%Y-%m-%dT%H:%M:%S').to_numpy()
+
+def chart_table(df: pd.DataFrame, time_unit: str, sum_columns: list[str] | None = None, last_columns: list[str] | None = None,
+                max_periods: int | None = CHART_MAX_PERIODS, period_end: bool = False) -> pd.DataFrame:
+    """Tidy per-period table with only the charted columns, within the payload cap.
+
+    It also holds the period start (and with period_end, its end) as naive local time strings for temporal axes.
+    """
+    
+    sum_columns, last_columns = sum_columns or [], last_columns or []
+    columns = sum_columns + last_columns
+    # ratios of empty periods come as pd.NA in object columns, charts get plain floats
+    table = df[columns].apply(pd.to_numeric, errors='coerce').astype('float64').reset_index(drop=True)
+    table.insert(0, 'period', period_labels(df['publish_time'], time_unit).to_numpy())
+    table.insert(1, 'time', _time_strings(df['publish_time']))
+    if period_end:
+        table.insert(2, 'end', _time_strings(df['publish_time'] + PERIOD_OFFSETS[time_unit]))
+        last_columns = last_columns + ['end'] # merged periods end with their last period
+    return table if max_periods is None else cap_periods(table, sum_columns, last_columns, max_periods)
+
+def downsample_trend(table: pd.DataFrame, columns: list[str], width: int = CHART_WIDTH_PX) -> pd.DataFrame:
+    """Keep the periods that preserve the shape of the trend series, with a point budget scaled by chart width."""
+    
+    budget = max(int(width * TREND_POINTS_PER_PX), 3)
+    if TREND_DOWNSAMPLE == 'none' or len(table) <= budget:
+        return table
+    rows = downsample_indices([table[col].to_numpy() for col in columns], budget, method=TREND_DOWNSAMPLE)
+    return table.iloc[rows].reset_index(drop=True)
+
+def _time_axis(time_unit: str) -> alt.X:
+    # temporal on both main page charts, so downsampled and merged periods keep their true spacing
+    return alt.X('time:T', title='Date', axis=alt.Axis(format=PERIOD_FORMATS[time_unit], labelAngle=-45))
+
 # Chart 1 - per period
 def create_main_chart(df: pd.DataFrame, time_unit: str, color: str, height: int = 400):
     
     if color:
-        df_melt = df.melt(
-            id_vars=['publish_time'],
-            value_vars=['Positive', 'Neutral', 'Negative'],
+        df_melt = chart_table(df, time_unit, sum_columns=SENTIMENT_COLUMNS, period_end=True).melt(
+            id_vars=['period', 'time', 'end'],
+            value_vars=SENTIMENT_COLUMNS,
             var_name='sentiment',
             value_name='count'
         )
     
-        chart = alt.Chart(df_melt).mark_bar().encode(
-            x=alt.X(
-                f'{time_unit}(publish_time):O',
-                title='Date',
-                axis=alt.Axis(labelAngle=-45)
-            ),
+        chart = alt.Chart(df_melt).mark_bar(stroke='white', strokeWidth=0.5).encode(
+            x=_time_axis(time_unit),
+            x2='end:T',
             y=alt.Y(
-                'sum(count):Q',
+                'count:Q',
                 title='Count'
             ),
             color=alt.Color(
@@ -35,36 +117,33 @@ def create_main_chart(df: pd.DataFrame, time_unit: str, color: str, height: int
                 ),
                 order=alt.Order('sentiment:N', sort='descending'),
                 tooltip=[
-                    alt.Tooltip(f'{time_unit}(publish_time):O', title='Period'),
+                    alt.Tooltip('period:O', title='Period'),
                     alt.Tooltip('sentiment:N', title='Sentiment'),
-                    alt.Tooltip('sum(count):Q', title='Count', format=',')
+                    alt.Tooltip('count:Q', title='Count', format=',')
                 ]
         )
     else:
-        df_chart = df[['publish_time', 'Positive', 'Neutral', 'Negative']].copy()
-        df_chart['Total']= df_chart[['Positive', 'Neutral', 'Negative']].sum(axis=1)
-        df_chart = df_chart[['publish_time', 'Total']]
+        df_chart = chart_table(df, time_unit, sum_columns=SENTIMENT_COLUMNS, period_end=True)
+        df_chart['Total']= df_chart[SENTIMENT_COLUMNS].sum(axis=1)
+        df_chart = df_chart[['period', 'time', 'end', 'Total']]
         
-        chart = alt.Chart(df_chart).mark_bar(color='lightgray').encode(
-            x=alt.X(
-                f'{time_unit}(publish_time):O',
-                title='Date',
-                axis=alt.Axis(labelAngle=-45)
-            ),
+        chart = alt.Chart(df_chart).mark_bar(color='lightgray', stroke='white', strokeWidth=0.5).encode(
+            x=_time_axis(time_unit),
+            x2='end:T',
             y=alt.Y(
-                'sum(Total):Q',
+                'Total:Q',
                 title='Count'
             ),
             tooltip=[
-                alt.Tooltip(f'{time_unit}(publish_time):O', title='Period'),
-                alt.Tooltip('sum(Total):Q', title='Count', format=',')
+                alt.Tooltip('period:O', title='Period'),
+                alt.Tooltip('Total:Q', title='Count', format=',')
             ]
         )
         
     return chart.properties(height=height)
 
 # Chart 2 - trend over time (multiple options)
-def create_trend_chart(df: pd.DataFrame, time_unit: str, chart_type: str, height: int = 400):
+def create_trend_chart(df: pd.DataFrame, time_unit: str, chart_type: str, height: int = 400, width: int = CHART_WIDTH_PX):
     """
     Create trend chart with multiple visualization options.
     
@@ -72,6 +151,10 @@ def create_trend_chart(df: pd.DataFrame, time_unit: str, chart_type: str, height
     - 'sentiment_index': Line chart of Sentiment Index
     - 'avg_rating': Line chart of Average Rating  
     - 'sentiment_proportion': Normalized stacked area chart of sentiment proportions
+
+    Long series are downsampled to a budget of points scaled by width, the configured CHART_WIDTH_PX
+    unless the caller knows better (Streamlit does not report a column's pixel width); kept points
+    show exact values.
     """
     
     # Config
@@ -80,12 +163,13 @@ def create_trend_chart(df: pd.DataFrame, time_unit: str, chart_type: str, height
         'avg_rating': {'title': 'Average Rating', 'color': 'gold'}
     }
     
-    x_enc = alt.X(f'{time_unit}(publish_time):O', title='Date', axis=alt.Axis(labelAngle=-45))
+    x_enc = _time_axis(time_unit)
     
     if chart_type == 'sentiment_proportion':
-        df = df.melt(
-            id_vars=['publish_time'],
-            value_vars=['positive_ratio', 'neutral_ratio', 'negative_ratio'],
+        df = chart_table(df, time_unit, last_columns=RATIO_COLUMNS, max_periods=None)
+        df = cap_periods(downsample_trend(df, RATIO_COLUMNS, width), [], RATIO_COLUMNS).melt(
+            id_vars=['period', 'time'],
+            value_vars=RATIO_COLUMNS,
             var_name='sentiment',
             value_name='proportion'
         )
@@ -101,14 +185,15 @@ def create_trend_chart(df: pd.DataFrame, time_unit: str, chart_type: str, height
             ),
             order=alt.Order('sentiment:N', sort='descending'),
             tooltip=[
-                alt.Tooltip(f'{time_unit}(publish_time):O', title='Period'),
+                alt.Tooltip('period:O', title='Period'),
                 alt.Tooltip('sentiment:N', title='Sentiment'),
                 alt.Tooltip('proportion:Q', title='Proportion', format='.1%')
             ]
         )
     else:
         c = config[chart_type]
-        df = df[['publish_time', chart_type]].copy()
+        df = chart_table(df, time_unit, last_columns=[chart_type], max_periods=None)
+        df = cap_periods(downsample_trend(df, [chart_type], width), [], [chart_type])
         
         chart = alt.Chart(df).mark_area(
             line={'color' : c['color']},
@@ -122,19 +207,20 @@ def create_trend_chart(df: pd.DataFrame, time_unit: str, chart_type: str, height
             x=x_enc,
             y=alt.Y(f'{chart_type}:Q', title=c['title']),
             tooltip=[
-                alt.Tooltip(f'{time_unit}(publish_time):O', title='Period'),
-                alt.Tooltip(f'{chart_type}:N', title=c['title'], format='.2f')
+                alt.Tooltip('period:O', title='Period'),
+                alt.Tooltip(f'{chart_type}:Q', title=c['title'], format='.2f')
             ]
         )
     
     return chart.properties(height=height)
 
 # Rating distribution chart
-def rating_distribution_chart(df: pd.DataFrame, height: int = 65):
+def rating_distribution_chart(df: pd.DataFrame | None = None, height: int = 65, counts: dict | None = None):
+    """Bar chart of reviews per star rating, counted from df or taken from precomputed counts."""
 
+    ratings = pd.Series(counts) if counts is not None else df['rating'].value_counts()
     dist = (
-        df['rating']
-        .value_counts()
+        ratings
         .reindex([5, 4, 3, 2, 1], fill_value=0)
         .reset_index()
     )
@@ -1,7 +1,17 @@
 # src/visualizations/wordcloud.py
 
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
 from wordcloud import WordCloud
-import matplotlib.pyplot as plt
+
+from src.config import WORDCLOUD_CACHE_SIZE, WORDCLOUD_SCALE
+
+# PNG bytes of rendered word clouds by fingerprint, least recently used first
+_png_cache: OrderedDict[str, bytes] = OrderedDict()
+_png_cache_lock = threading.Lock()
 
 def prepare_ngram_wordcloud_dict(ngrams_dict: dict) -> dict:
     """Prepare a dictionary for word cloud generation from n-gram DataFrame."""
@@ -18,12 +28,13 @@ def prepare_ngram_wordcloud_dict(ngrams_dict: dict) -> dict:
         freqs[label] = count
     return freqs
 
-def generate_wordcloud(ngrams_dict: dict, colormap: str = 'viridis', max_words: int = 20, width: int = 800, height: int = 400):
+def generate_wordcloud(ngrams_dict: dict, colormap: str = 'viridis', max_words: int = 20, width: int = 800, height: int = 400, scale: float = 1):
     """Generate a word cloud from frequency dictionary."""
     
     wordcloud = WordCloud(
         width=width,
         height=height,
+        scale=scale,
         background_color=None,
         colormap=colormap,
         max_words=50,
@@ -35,8 +46,34 @@ def generate_wordcloud(ngrams_dict: dict, colormap: str = 'viridis', max_words:
 def render_wordcloud_figure(wordcloud, dpi=300):
     """Render a word cloud as a Matplotlib figure."""
     
+    import matplotlib.pyplot as plt # pages render PNG bytes, only this legacy helper needs pyplot
     fig, ax = plt.subplots(figsize=(10, 5), dpi=dpi)
     ax.imshow(wordcloud, interpolation='bilinear')
     ax.axis('off')
     plt.tight_layout(pad=0)
-    return fig
\ No newline at end of file
+    return fig
+
+def wordcloud_fingerprint(ngrams_dict: dict, colormap: str, width: int, height: int, scale: float) -> str:
+    """Hash of everything that determines the rendered word cloud."""
+    
+    payload = repr((list(ngrams_dict['ngram']), list(ngrams_dict['count']), colormap, width, height, scale))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def wordcloud_png(ngrams_dict: dict, colormap: str = 'viridis', width: int = 800, height: int = 400, scale: float = WORDCLOUD_SCALE) -> bytes:
+    """Word cloud rendered straight to PNG bytes, cached by fingerprint with LRU eviction."""
+    
+    key = wordcloud_fingerprint(ngrams_dict, colormap, width, height, scale)
+    with _png_cache_lock:
+        if key in _png_cache:
+            _png_cache.move_to_end(key)
+            return _png_cache[key]
+
+    buffer = io.BytesIO()
+    generate_wordcloud(ngrams_dict, colormap=colormap, width=width, height=height, scale=scale).to_image().save(buffer, format='PNG')
+    png = buffer.getvalue()
+
+    with _png_cache_lock:
+        _png_cache[key] = png
+        while len(_png_cache) > WORDCLOUD_CACHE_SIZE:
+            _png_cache.popitem(last=False)
+    return png